@@ -1,14 +1,71 @@
 # using https://github.com/biocypher/project-template/blob/main/template_package/adapters/example_adapter.py as blueprint
 
+import os
 import string
 from enum import Enum, auto
 from itertools import chain
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
 from biocypher._logger import logger
 from adapters import Adapter, Node, Edge
+from adapters.nodes import NodeRecord, fields_of
+from adapters.edges import EdgeRecord
 from utils.str_utils import escape_text
+from utils.file_utils import newline_aligned_chunks, read_chunk_lines
+from utils.rsid_index import write_rsid_index
 
 logger.debug(f"Loading module {__name__}.")
 
+def parse_dbsnp_chunk(args, common_only:bool = True):
+    """
+    Parse one newline-aligned byte range of the processed dbSNP file, keeping
+    common snps only by default. Runs in worker processes, so it must stay at
+    module level.
+    """
+    file, start, end = args
+    nodes = []
+    for l in read_chunk_lines(file, start, end):
+        l = l.strip()
+        if common_only and not l.endswith('True'): # cheap check before splitting
+            continue
+        lst = l.split('\t')
+        if not common_only or lst[-1] == 'True': # common snp
+            nodes.append({
+                'rsid': lst[3],
+                'ref': lst[4],
+                'alt': lst[5],
+                'id': lst[3],
+                'source': 'dbSNP'
+            })
+    return nodes
+
+def iter_dbsnp_chunks(file:str, n_workers:int = None, chunk_size:int = 64 * 1024 * 1024, common_only:bool = True):
+    """
+    Yield lists of parsed dbSNP records chunk by chunk, in file order.
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    chunks = [(file, start, end) for start, end in newline_aligned_chunks(file, chunk_size)]
+    logger.debug(f"Parsing {len(chunks)} chunks of dbSNP with {n_workers} workers.")
+    parse = partial(parse_dbsnp_chunk, common_only=common_only)
+    if n_workers == 1 or len(chunks) <= 1:
+        yield from map(parse, chunks)
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            yield from executor.map(parse, chunks) # ordered
+
+def build_rsid_index(file:str, out_dir:str, with_alleles:bool = True, common_only:bool = True, n_workers:int = None):
+    """
+    Build the memory-mapped rsID index used by Variant_Grounder from the
+    processed dbSNP file. See utils.rsid_index.
+    """
+    logger.info(f"Building rsID index in {out_dir}.")
+    records = (
+        (d['rsid'], d['ref'], d['alt'])
+        for nodes in iter_dbsnp_chunks(file, n_workers=n_workers, common_only=common_only)
+        for d in nodes
+    )
+    return write_rsid_index(records, out_dir, with_alleles=with_alleles)
+
 
 class dbSNPAdapter_NodeType(Enum):
     """
@@ -128,53 +185,31 @@ class dbSNPAdapter(Adapter):
         for edge in self.edges:
             yield (edge.get_id(), edge.get_source(), edge.get_target(), edge.get_label(), edge.get_properties())
 
-    def load_data(self, file:str):
+    def load_data(self, file:str, n_workers:int = None, chunk_size:int = 64 * 1024 * 1024):
         """
-        Parse processed dbSNP
+        Parse processed dbSNP. The file is split into newline-aligned byte
+        ranges that are parsed in a process pool; results keep file order.
+
+        Args:
+            file: processed dbSNP tsv.
+            n_workers: number of worker processes, defaults to os.cpu_count().
+                Use 1 to parse in the current process.
+            chunk_size: approximate size of each byte range in bytes.
         """
         logger.info("Loading dbSNP from disk.")
         data = {
             'nodes': [],
             'edges': []
         }
-        with open(file) as f:
-            for l in f:
-                lst = l.strip().split('\t')
-                if lst[-1] == 'True': # common snp
-                    data['nodes'].append({
-                        'rsid': lst[3],
-                        'ref': lst[4],
-                        'alt': lst[5],
-                        'id': lst[3],
-                        'source': 'dbSNP'
-                    })
+        for nodes in iter_dbsnp_chunks(file, n_workers=n_workers, chunk_size=chunk_size):
+            data['nodes'] += nodes
         self.data = data
         return self
 
-class SNV(Node):
+class SNV(NodeRecord):
     """
     snv nodes
     """
-    def __init__(self, id:str=None, fields: list = None, properties: dict = None):
-        self.id = id
-        self.label = 'snv'
-        self.fields = self._generate_fields(fields)
-        self.properties = self._generate_properties(properties)
-    
-    def _generate_fields(self, fields):
-        if fields is not None:
-            return [i.value for i in dbSNPAdapter_Snv_Field]
-        else:
-            return fields
-
-    def _generate_properties(self, properties):
-        prop_dict = {}
-        for field in self.fields:
-            f = properties.get(field)
-            if f:
-                if isinstance(f, str):
-                    prop_dict[field] = escape_text(f)
-                else:
-                    prop_dict[field] = properties.get(field)
-        
-        return prop_dict
+    __slots__ = ()
+    LABEL = 'snv'
+    FIELDS = fields_of(dbSNPAdapter_Snv_Field)
@@ -0,0 +1,50 @@
+from adapters.properties import get_projector
+
+
+class EdgeRecord:
+    """
+    Compact edge record shared by all adapters. Subclasses set LABEL and
+    FIELDS once at class level; a field list passed by the caller gets its own
+    shared projector instead of being stored on the edge.
+    """
+    __slots__ = ('id', 'source', 'target', 'properties')
+    LABEL = None
+    FIELDS = ()
+    PROJECTOR = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.PROJECTOR = get_projector(cls.LABEL, cls.FIELDS)
+
+    def __init__(self, source:str, target:str, id:str=None, fields: list = None, properties: dict = None):
+        self.id = id
+        self.source = source
+        self.target = target
+        projector = self.PROJECTOR if fields is None else get_projector(self.LABEL, fields)
+        self.properties = projector(properties)
+
+    @property
+    def label(self):
+        return self.LABEL
+
+    @property
+    def fields(self):
+        return self.FIELDS
+
+    def get_id(self):
+        return self.id
+
+    def get_source(self):
+        return self.source
+
+    def get_target(self):
+        return self.target
+
+    def get_label(self):
+        return self.LABEL
+
+    def get_properties(self):
+        return self.properties
+
+    def to_tuple(self):
+        return (self.id, self.source, self.target, self.LABEL, self.properties)
@@ -6,7 +6,12 @@ from enum import Enum, auto
 from itertools import chain
 from biocypher._logger import logger
 from adapters import Adapter, Node, Edge
+from adapters.nodes import NodeRecord, fields_of
+from adapters.edges import EdgeRecord
 from utils.str_utils import escape_text
+from utils.ontology_snapshot import get_ontology_snapshot, SNAPSHOT_DIR
+from utils.closure_index import get_closure_index
+from utils.curie_utils import apply_curie_rule
 import pandas as pd
 from collections import defaultdict
 
@@ -149,23 +154,34 @@ class GOAdapter(Adapter):
         for edge in self.edges:
             yield (edge.get_id(), edge.get_source(), edge.get_target(), edge.get_label(), edge.get_properties())
 
-    def load_data(self, ids: dict=None):
+    def load_data(self, ids: dict=None, snapshot_dir: str=SNAPSHOT_DIR):
         """
         Parse obo ontology
+
+        Args:
+            ids: node type to GO root identifier, defaults to ID.
+            snapshot_dir: directory of cached ontology snapshots (see
+                utils.ontology_snapshot). None parses with pyobo every time.
         """
         logger.info("Parsing obo onotlogies")
         if not ids:
             ids = ID
         self.data = defaultdict(list)
 
-        onto = pyobo.get_ontology('go')
+        if snapshot_dir:
+            onto = get_ontology_snapshot('go', snapshot_dir=snapshot_dir)
+            # precomputed closure, descendants are array slices
+            hierarchy = get_closure_index('go', snapshot_dir=snapshot_dir, snapshot=onto)
+        else:
+            onto = pyobo.get_ontology('go')
+            hierarchy = onto
         mapping = onto.get_id_name_mapping()
         synonyms = onto.get_id_synonyms_mapping()
         descriptions = onto.get_id_definition_mapping()
         df = onto.get_relations_df()
         
         for n in self.node_types:
-            for identifier in onto.descendants(ids[n]):
+            for identifier in hierarchy.descendants(ids[n]):
                 curie = f'go:{identifier}'
                 dat = {
                     'curie': curie,
@@ -178,69 +194,29 @@ class GOAdapter(Adapter):
         
         df.columns = ['head', 'rel_ns', 'type', 'source', 'tail']
         df = df[df['source']=='go']
-        df['head'] = df['head'].apply(lambda x: f'go:{x}')
-        df['tail'] = df['tail'].apply(lambda x: f'go:{x}')
+        df['head'] = apply_curie_rule(df['head'], 'go')
+        df['tail'] = apply_curie_rule(df['tail'], 'go')
         self.data['edges'] += list(df.to_dict(orient='index').values())
                     
 
         return self
 
-class OBOConcept(Node):
+class OBOConcept(NodeRecord):
     """
     obo concept nodes
     """
+    __slots__ = ('label',)
+    FIELDS = fields_of(GOAdapter_Field)
+    ESCAPE_LISTS = True
+
     def __init__(self, label:str, id:str=None, fields: list = None, properties: dict = None):
-        self.id = id
         self.label = label
-        self.fields = self._generate_fields(fields)
-        self.properties = self._generate_properties(properties)
-    
-    def _generate_fields(self, fields):
-        if fields is not None:
-            return [i.value for i in GOAdapter_Field]
-        else:
-            return fields
-
-    def _generate_properties(self, properties):
-        prop_dict = {}
-        for field in self.fields:
-            f = properties.get(field)
-            if f:
-                if isinstance(f, str):
-                    prop_dict[field] = escape_text(f)
-                elif isinstance(f, list):
-                    prop_dict[field] = [escape_text(t) for t in f]
-                else:
-                    prop_dict[field] = properties.get(field)
-        
-        return prop_dict
+        super().__init__(id=id, fields=fields, properties=properties)
 
-class Hier(Edge):
+class Hier(EdgeRecord):
     """
     hierarchical_structure edges
     """
-    def __init__(self, source:str, target:str, id:str=None, fields: list = None, properties: dict = None):
-        self.id = id
-        self.source = source
-        self.target = target
-        self.label = "hierarchical_structure"
-        self.fields = self._generate_fields(fields)
-        self.properties = self._generate_properties(properties)
-    
-    def _generate_fields(self, fields):
-        if fields is None:
-            return [i.value for i in GOAdapter_Hier_EdgeField]
-        else:
-            return fields
-
-    def _generate_properties(self, properties):
-        prop_dict = {}
-        for field in self.fields:
-            f = properties.get(field)
-            if f:
-                if isinstance(f, str):
-                    prop_dict[field] = escape_text(f)
-                else:
-                    prop_dict[field] = properties.get(field)
-        
-        return prop_dict
\ No newline at end of file
+    __slots__ = ()
+    LABEL = "hierarchical_structure"
+    FIELDS = fields_of(GOAdapter_Hier_EdgeField)
@@ -6,15 +6,25 @@ from itertools import chain
 from biocypher._logger import logger
 from adapters import Adapter, Node, Edge
 from utils.str_utils import escape_text
+from utils.curie_utils import split_curie, pmid_if_numeric
 from entity_mapping.gilda_grounders import Gene_Grounder
 from collections import defaultdict
 import pandas as pd
 logger.debug(f"Loading module {__name__}.")
 
-GENE_GROUNDER = Gene_Grounder(prefixes=None, file='/nfs/turbo/umms-drjieliu/proj/medlineKG/data/gilda_vocab/custom_grounders/gene.json')
+GENE_GROUNDER_FILE = '/nfs/turbo/umms-drjieliu/proj/medlineKG/data/gilda_vocab/custom_grounders/gene.json'
+_GROUNDERS = {}
+
+def get_gene_grounder(file:str = GENE_GROUNDER_FILE):
+    """
+    The process-wide Gene_Grounder of file, loaded on first use.
+    """
+    if file not in _GROUNDERS:
+        _GROUNDERS[file] = Gene_Grounder(prefixes=None, file=file)
+    return _GROUNDERS[file]
 
 def ground_gene(name):
-    ms = [m.term.get_curie() for m in GENE_GROUNDER.ground(name)]
+    ms = [m.term.get_curie() for m in get_gene_grounder().ground(name)]
     if len(ms)>0:
         return ms[0]
 
@@ -147,14 +157,11 @@ class GWASAdapter(Adapter):
         df['source'] = 'gwas'
         self.data['edges']['variant_gene'] += list(df.drop_duplicates().dropna(subset=['head', 'tail']).to_dict(orient='index').values())
 
-        def transform_trait_id(id):
-            lst = id.split('/')[-1].split('_')
-            return f"{lst[0].lower()}:{lst[1]}"
         df = pd.read_csv(snp_trait, sep='\t')
         df.columns = ['trait', 'tail', 'head', 'chr', 'start', 'end', 'risk allele', 'type', 'Intergenic', 'CNV', 'Risk_freq', 'from_article', 'Accession', 'P_mlog', 'OR_Beta']
-        df['tail'] = df['tail'].apply(transform_trait_id)
+        df['tail'] = split_curie(df['tail'].astype(str).str.split('/').str[-1]) # .../EFO_0000305 -> efo:0000305
         df = df[['head', 'tail', 'type', 'risk allele', 'from_article']]
-        df['from_article'] = df['from_article'].apply(lambda x: f'pmid{x}' if str(x).isnumeric() else x)
+        df['from_article'] = pmid_if_numeric(df['from_article'])
         df['source'] = 'gwas'
         df['label'] = 'variant_disease'
         self.data['edges']['variant_disease'] += list(df.drop_duplicates().dropna(subset=['head', 'tail']).to_dict(orient='index').values())
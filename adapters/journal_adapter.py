@@ -5,6 +5,8 @@ from enum import Enum, auto
 from itertools import chain
 from biocypher._logger import logger
 from adapters import Adapter, Node, Edge
+from adapters.nodes import NodeRecord, fields_of
+from adapters.edges import EdgeRecord
 from utils.str_utils import escape_text
 
 logger.debug(f"Loading module {__name__}.")
@@ -159,30 +161,10 @@ class JournalAdapter(Adapter):
                 key, val = lst[0], ''.join(lst[1:])
                 journal[key.strip()] = val.strip()
     
-class Journal(Node):
+class Journal(NodeRecord):
     """
     journal nodes
     """
-    def __init__(self, id:str=None, fields: list = None, properties: dict = None):
-        self.id = id
-        self.label = 'journal'
-        self.fields = self._generate_fields(fields)
-        self.properties = self._generate_properties(properties)
-    
-    def _generate_fields(self, fields):
-        if fields is not None:
-            return [i.value for i in JournalAdapter_Journal_Field]
-        else:
-            return fields
-
-    def _generate_properties(self, properties):
-        prop_dict = {}
-        for field in self.fields:
-            f = properties.get(field)
-            if f:
-                if isinstance(f, str):
-                    prop_dict[field] = escape_text(f)
-                else:
-                    prop_dict[field] = properties.get(field)
-        
-        return prop_dict
\ No newline at end of file
+    __slots__ = ()
+    LABEL = 'journal'
+    FIELDS = fields_of(JournalAdapter_Journal_Field)
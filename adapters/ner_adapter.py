@@ -1,7 +1,13 @@
+import os
 import json
+import atexit
+import tempfile
 from enum import Enum
 from adapters import Adapter, Node, Edge
-from utils import escape_text
+from adapters.nodes import NodeRecord, fields_of
+from adapters.edges import EdgeRecord
+from information_extraction.ner_pipeline import read_jsonl, read_parquet
+from utils.str_utils import stable_id
 
 class NERAdapter_NodeType(Enum):
     MENTION = "genomic_mention"
@@ -40,220 +46,242 @@ class NERAdapter_EdgeType(Enum):
     CONTAIN_MENTION = "contain_mention"
     MAP_TO = "mapped_to"
 
+JSONL_SUFFIXES = ('.jsonl', '.jsonl.gz')
+MENTION_COLUMNS = ['sentid', 'type', 'entity', 'start', 'end', 'score', 'grounding_curies', 'grounding_scores']
+
+def get_mention_id(ent: dict):
+    """
+    Id of a mention hashed from (sentence id, char_start, char_end, type):
+    the same on every run and independent of the file, shard or order the
+    mention is read in, so NER shards can be ingested in parallel and
+    re-ingested without duplicating mentions.
+    """
+    return stable_id('mention', ent['sentid'], ent['start'], ent['end'], ent['type'])
+
+def unique_groundings(groundings):
+    """
+    One (curie, score) per curie, with its highest score, in first-seen
+    order; several grounders can return the same curie for a mention, which
+    would repeat the mention's mapped_to and contain_term edge ids.
+    """
+    best = {}
+    for curie, score in groundings or []:
+        if curie not in best or (score is not None and (best[curie] is None or score > best[curie])):
+            best[curie] = score
+    return list(best.items())
+
+
 class NERAdapter(Adapter):
+    """
+    NER BioCypher adapter. Works on NER records, one dict per document:
+    {'pmid': 'pmid123', 'mentions': [{'sentid', 'type', 'entity', 'start',
+    'end', 'score', 'groundings'}, ...]}, with offsets into the sentence.
+    """
     def __init__(self, node_types=None, node_fields=None, edge_types=None, edge_fields=None):
         self._set_types_and_fields(node_types, node_fields, edge_types, edge_fields)
-        self.data = None
+        self.records = None
+        self.jsonl = None
+        self.parquet = None
+        self.parquet_filters = {}
+        self.xml = None
+        self.stage_args = {}
+        self.spill = None
+
+    def load_data(self, file: str, min_score: float = None, types: list = None, **stage_args):
+        """
+        Args:
+            file: NER records as JSON Lines (optionally gzipped) or NER
+                mentions as Parquet (a file, or a directory of either), both
+                streamed from disk by get_nodes and get_edges; a MEDLINE xml
+                (optionally gzipped), streamed through the NER pipeline stage
+                on the first pass and spilled to a temporary JSON Lines file
+                for the next ones; or a NER json keyed by entity type,
+                attached to doc_0.
+            min_score, types: Parquet only, read just the mentions with
+                score >= min_score and a type in types.
+            stage_args: NERStage options, used when the stage is first started.
+        """
+        self.records, self.jsonl, self.parquet = None, None, None
+        self._drop_spill()
+        if os.path.isdir(file):
+            names = sorted(os.listdir(file))
+            if any(n.endswith('.parquet') for n in names):
+                self.parquet = file
+                self.parquet_filters = {'min_score': min_score, 'types': types}
+            elif any(n.endswith(JSONL_SUFFIXES) for n in names):
+                self.jsonl = [os.path.join(file, n) for n in names if n.endswith(JSONL_SUFFIXES)]
+            else:
+                raise ValueError(f"{file} has no .parquet or .jsonl NER files.")
+        elif file.endswith('.parquet'):
+            self.parquet = file
+            self.parquet_filters = {'min_score': min_score, 'types': types}
+        elif file.endswith(JSONL_SUFFIXES):
+            self.jsonl = [file]
+        elif file.endswith(('.xml', '.xml.gz')):
+            self.xml, self.stage_args = file, stage_args
+        else:
+            with open(file, "r") as f:
+                data = json.load(f)
+            self.records = [{
+                'pmid': 'doc_0',
+                'mentions': [
+                    dict(ent, sentid='doc_0', type=entity_type)
+                    for entity_type, entities in data.items() for ent in entities
+                ]
+            }]
+        return self
+
+    def load_records(self, records):
+        """
+        Use NER records produced elsewhere, e.g. by NERStage.run.
+        """
+        self.records, self.jsonl, self.parquet = list(records), None, None
+        self._drop_spill()
+        return self
+
+    def _drop_spill(self):
+        if self.spill and os.path.exists(self.spill):
+            os.remove(self.spill)
+        self.xml, self.spill = None, None
+
+    def _run_stage(self):
+        """
+        Stream the records of self.xml from the NER stage, writing them to a
+        spill file that later passes read instead of running NER again.
+        """
+        from information_extraction.ner_pipeline import get_ner_stage, pubmed_documents
+        fd, spill = tempfile.mkstemp(prefix='ner_', suffix='.jsonl')
+        os.close(fd)
+        tmp = spill + '.tmp'
+        atexit.register(lambda: [os.remove(p) for p in (spill, tmp) if os.path.exists(p)])
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for record in get_ner_stage(**self.stage_args).run(pubmed_documents(self.xml)):
+                f.write(json.dumps(record, ensure_ascii=False))
+                f.write('\n')
+                yield record
+        # only a complete pass is reused, an interrupted one runs NER again
+        os.replace(tmp, spill)
+        self.spill = spill
+
+    def iter_records(self):
+        if self.jsonl:
+            # re-read on every pass, only one document is in memory at a time
+            for path in self.jsonl:
+                yield from read_jsonl(path)
+        elif self.xml:
+            if self.spill:
+                yield from read_jsonl(self.spill)
+            else:
+                yield from self._run_stage()
+        elif self.records is not None:
+            yield from self.records
+        else:
+            raise Exception('Please provide a NER file, or run load_data first!')
 
-    def load_data(self, file: str):
-        with open(file, "r") as f:
-            self.data = json.load(f)
+    def iter_mentions(self):
+        if self.parquet:
+            # the pmid column is never read
+            for ent in read_parquet(self.parquet, columns=MENTION_COLUMNS, **self.parquet_filters):
+                ent['groundings'] = unique_groundings(ent.get('groundings'))
+                yield get_mention_id(ent), ent
+            return
+        for record in self.iter_records():
+            for ent in record['mentions']:
+                ent = dict(ent, groundings=unique_groundings(ent.get('groundings')))
+                yield get_mention_id(ent), ent
 
     def get_nodes(self, file: str = None):
         if file:
             self.load_data(file)
-        nodes = []
-        node_id = 0
-        for entity_type, entities in self.data.items():
-            for ent in entities:
-                node = GenomicMention(
-                    id=f"mention_{node_id}",
-                    fields=[
-                        NERAdapter_Mention_Field.TEXT.value,
-                        NERAdapter_Mention_Field.CHAR_START.value,
-                        NERAdapter_Mention_Field.CHAR_END.value,
-                        NERAdapter_Mention_Field.TYPE.value,
-                        NERAdapter_Mention_Field.SCORE.value,
-                        NERAdapter_Mention_Field.GROUNDINGS.value
-                    ],
+        for mention_id, ent in self.iter_mentions():
+            yield GenomicMention(
+                id=mention_id,
+                properties={
+                    "text": ent["entity"],
+                    "char_start": ent["start"],
+                    "char_end": ent["end"],
+                    "type": ent["type"],
+                    "score": ent["score"],
+                    "groundings": ent.get("groundings", [])
+                }
+            ).to_tuple()
+
+    def get_edges(self, file: str = None):
+        if file:
+            self.load_data(file)
+        for mention_id, ent in self.iter_mentions():
+            sentid = ent['sentid']
+            # ContainMention edge from the sentence to the mention
+            yield ContainMention(
+                source=sentid,
+                target=mention_id,
+                id=f"contain_{mention_id}",
+                properties={"source": "NER"}
+            ).to_tuple()
+            # MapTo edges for each grounding
+            for curie, score in ent.get("groundings", []):
+                yield MapTo(
+                    source=mention_id,
+                    target=curie,
+                    id=f"mapto_{mention_id}_{curie}",
+                    properties={"source": "NER", "score": score}
+                ).to_tuple()
+                yield ContainTerm(
+                    source=sentid,
+                    target=curie,
+                    id=f"containterm_{mention_id}_{curie}",
                     properties={
                         "text": ent["entity"],
                         "char_start": ent["start"],
                         "char_end": ent["end"],
-                        "type": entity_type,
-                        "score": ent["score"],
-                        "groundings": ent.get("groundings", [])
+                        "type": ent["type"],
+                        "source": "NER",
+                        "normalized_name": curie,
+                        "prob": ent.get("score", None)
                     }
-                )
-                nodes.append(node)
-                node_id += 1
-        return nodes
-
-    def get_edges(self, file: str = None):
-        if file:
-            self.load_data(file)
-        edges = []
-        node_id = 0
-        for entity_type, entities in self.data.items():
-            for ent in entities:
-                mention_id = f"mention_{node_id}"
-                # ContainMention edge (from a dummy doc node "doc_0" to mention)
-                contain_edge = ContainMention(
-                    source="doc_0",
-                    target=mention_id,
-                    id=f"contain_{node_id}",
-                    fields=["source", "target"],
-                    properties={}
-                )
-                edges.append(contain_edge)
-                # MapTo edges for each grounding
-                for idx, grounding in enumerate(ent.get("groundings", [])):
-                    curie, score = grounding
-                    mapto_edge = MapTo(
-                        source=mention_id,
-                        target=curie,
-                        id=f"mapto_{node_id}_{idx}",
-                        fields=["source", "target", "score"],
-                        properties={"score": score}
-                    )
-                    edges.append(mapto_edge)
-                    contain_term_edge = ContainTerm(
-                        source="doc_0",
-                        target=curie,
-                        id=f"containterm_{node_id}_{idx}",
-                        properties={
-                            "text": ent["entity"],
-                            "char_start": ent["start"],
-                            "char_end": ent["end"],
-                            "type": entity_type,
-                            "source": "NER",
-                            "norm_name": curie,
-                            "prob": ent.get("score", None)
-                        }
-                    )
-                    edges.append(contain_term_edge)
-                node_id += 1
-        return edges
+                ).to_tuple()
 
 
-class GenomicMention(Node):
+class GenomicMention(NodeRecord):
     """
     genomic mention nodes
     """
-    def __init__(self, id:str=None, fields: list = None, properties: dict = None):
-        self.id = id
-        self.label = 'genomic_mention'
-        self.fields = self._generate_fields(fields)
-        self.properties = self._generate_properties(properties)
-    
-    def _generate_fields(self, fields):
-        if fields is None:
-            return [i.value for i in NERAdapter_Mention_Field]
-        else:
-            return fields
-
-    def _generate_properties(self, properties):
-        prop_dict = {}
-        for field in self.fields:
-            f = properties.get(field)
-            if f:
-                if isinstance(f, str):
-                    prop_dict[field] = escape_text(f)
-                else:
-                    prop_dict[field] = properties.get(field)
-        
-        return prop_dict
+    __slots__ = ()
+    LABEL = 'genomic_mention'
+    FIELDS = fields_of(NERAdapter_Mention_Field)
 
-class ContainTerm(Edge):
+class ContainTerm(EdgeRecord):
     """
     contain_term edges
     """
-    def __init__(self, source:str, target:str, id:str=None, fields: list = None, properties: dict = None):
-        self.id = id
-        self.source = source
-        self.target = target
-        self.label = "contain_term"
-        self.fields = self._generate_fields(fields)
-        self.properties = self._generate_properties(properties)
-    
-    def _generate_fields(self, fields):
-        if fields is None:
-            return [i.value for i in NERAdapter_ContainTerm_EdgeField]
-        else:
-            return fields
-
-    def _generate_properties(self, properties):
-        prop_dict = {}
-        for field in self.fields:
-            f = properties.get(field)
-            if f:
-                if isinstance(f, str):
-                    prop_dict[field] = escape_text(f)
-                else:
-                    prop_dict[field] = properties.get(field)
-        
-        return prop_dict
+    __slots__ = ()
+    LABEL = "contain_term"
+    FIELDS = fields_of(NERAdapter_ContainTerm_EdgeField)
 
-class ContainMention(Edge):
+class ContainMention(EdgeRecord):
     """
     contain_mention edges
     """
-    def __init__(self, source:str, target:str, id:str=None, fields: list = None, properties: dict = None):
-        self.id = id
-        self.source = source
-        self.target = target
-        self.label = "contain_mention"
-        self.fields = self._generate_fields(fields)
-        self.properties = self._generate_properties(properties)
-    
-    def _generate_fields(self, fields):
-        if fields is None:
-            return [i.value for i in NERAdapter_EdgeType]
-        else:
-            return fields
-
-    def _generate_properties(self, properties):
-        prop_dict = {}
-        for field in self.fields:
-            f = properties.get(field)
-            if f:
-                if isinstance(f, str):
-                    prop_dict[field] = escape_text(f)
-                else:
-                    prop_dict[field] = properties.get(field)
-        
-        return prop_dict
+    __slots__ = ()
+    LABEL = "contain_mention"
+    FIELDS = fields_of(NERAdapter_ContainMention_EdgeField)
 
 
-class MapTo(Edge):
+class MapTo(EdgeRecord):
     """
     mapped_to edges
     """
-    def __init__(self, source:str, target:str, id:str=None, fields: list = None, properties: dict = None):
-        self.id = id
-        self.source = source
-        self.target = target
-        self.label = "mapped_to"
-        self.fields = self._generate_fields(fields)
-        self.properties = self._generate_properties(properties)
-    
-    def _generate_fields(self, fields):
-        if fields is None:
-            return [i.value for i in NERAdapter_MapTo_EdgeField]
-        else:
-            return fields
-
-    def _generate_properties(self, properties):
-        prop_dict = {}
-        for field in self.fields:
-            f = properties.get(field)
-            if f:
-                if isinstance(f, str):
-                    prop_dict[field] = escape_text(f)
-                else:
-                    prop_dict[field] = properties.get(field)
-        
-        return prop_dict
+    __slots__ = ()
+    LABEL = "mapped_to"
+    FIELDS = fields_of(NERAdapter_MapTo_EdgeField)
 
 # Example usage
 if __name__ == "__main__":
     adapter = NERAdapter()
     adapter.load_data("example_ner_output.json")
-    nodes = adapter.get_nodes()
-    edges = adapter.get_edges()
     print("Nodes:")
-    for n in nodes:
-        print(vars(n))
+    for n in adapter.get_nodes():
+        print(n)
     print("\nEdges:")
-    for e in edges:
-        print(vars(e))
\ No newline at end of file
+    for e in adapter.get_edges():
+        print(e)
\ No newline at end of file
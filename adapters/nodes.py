@@ -0,0 +1,53 @@
+from adapters.properties import get_projector
+
+
+def fields_of(enum):
+    """
+    Field names of a field Enum, computed once per record class.
+    """
+    return tuple(i.value for i in enum)
+
+
+class NodeRecord:
+    """
+    Compact node record shared by all adapters. Subclasses set LABEL and
+    FIELDS once at class level; instances only hold the id and the projected
+    properties.
+    """
+    __slots__ = ('id', 'properties')
+    LABEL = None
+    FIELDS = ()
+    ESCAPE_LISTS = False # escape every string of list properties
+    PROJECTOR = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.PROJECTOR = get_projector(cls.LABEL, cls.FIELDS, cls.ESCAPE_LISTS)
+
+    def __init__(self, id:str=None, fields: list = None, properties: dict = None):
+        # node fields always come from the record class
+        self.id = id
+        self.properties = self._generate_properties(properties)
+
+    @property
+    def label(self):
+        return self.LABEL
+
+    @property
+    def fields(self):
+        return self.FIELDS
+
+    def get_id(self):
+        return self.id
+
+    def get_label(self):
+        return self.label
+
+    def get_properties(self):
+        return self.properties
+
+    def to_tuple(self):
+        return (self.id, self.label, self.properties)
+
+    def _generate_properties(self, properties):
+        return self.PROJECTOR(properties)
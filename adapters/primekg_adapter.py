@@ -6,7 +6,8 @@ from itertools import chain
 from biocypher._logger import logger
 from adapters import Adapter, Node, Edge
 from utils.str_utils import escape_text
-from utils.mapper import biomart_mapper, drugbank_mapper
+from utils.mapper import get_biomart_mapper, get_drugbank_mapper
+from utils.curie_utils import CURIE_RULES, apply_curie_rule, to_curie
 from entity_mapping.gilda_grounders import Disease_Grounder, Chemical_Grounder
 import pandas as pd
 logger.debug(f"Loading module {__name__}.")
@@ -36,18 +37,33 @@ LABEL_MAPPING = {
     'anatomy_protein_absent': 'gene_anatomy'
 }
 
-GENE_MAPPER = biomart_mapper()
-CHEM_MAPPER = drugbank_mapper()
-DISEASE_GROUNDER = Disease_Grounder(prefixes=None, file='/nfs/turbo/umms-drjieliu/proj/medlineKG/data/gilda_vocab/custom_grounders/disease.json')
-CHEM_GROUNDER = Chemical_Grounder(prefixes=None, file='/nfs/turbo/umms-drjieliu/proj/medlineKG/data/gilda_vocab/custom_grounders/chemical.json')
+DISEASE_GROUNDER_FILE = '/nfs/turbo/umms-drjieliu/proj/medlineKG/data/gilda_vocab/custom_grounders/disease.json'
+CHEMICAL_GROUNDER_FILE = '/nfs/turbo/umms-drjieliu/proj/medlineKG/data/gilda_vocab/custom_grounders/chemical.json'
+_GROUNDERS = {}
+
+def get_disease_grounder(file:str = DISEASE_GROUNDER_FILE):
+    """
+    The process-wide Disease_Grounder of file, loaded on first use.
+    """
+    if file not in _GROUNDERS:
+        _GROUNDERS[file] = Disease_Grounder(prefixes=None, file=file)
+    return _GROUNDERS[file]
+
+def get_chemical_grounder(file:str = CHEMICAL_GROUNDER_FILE):
+    """
+    The process-wide Chemical_Grounder of file, loaded on first use.
+    """
+    if file not in _GROUNDERS:
+        _GROUNDERS[file] = Chemical_Grounder(prefixes=None, file=file)
+    return _GROUNDERS[file]
 
 def ground_primekg(source, id, name):
     if source=='NCBI':
-        m = GENE_MAPPER.get(str(id), 'entrez')
+        m = get_biomart_mapper().get(str(id), 'entrez')
         if m:
             return f'hgnc:{m}'
     elif source=='DrugBank':
-        m = CHEM_MAPPER.get(str(id))
+        m = get_drugbank_mapper().get(str(id))
         if m:
             return f'chebi:{m}'
     elif source=='HPO':
@@ -57,16 +73,35 @@ def ground_primekg(source, id, name):
     elif source=='REACTOME':
         return f'{source.lower()}:{id}'
     elif source=='MONDO_grouped':
-        terms = DISEASE_GROUNDER.ground(name)
+        terms = get_disease_grounder().ground(name)
         ms =  [m.term.get_curie() for m in terms]
         if len(ms)>0:
             return ms[0]
     elif source=='CTD':
-        terms = CHEM_GROUNDER.ground(name)
+        terms = get_chemical_grounder().ground(name)
         ms = [m.term.get_curie() for m in terms]
         if len(ms)>0:
             return ms[0]
 
+def ground_primekg_column(sources, ids, names):
+    """
+    Column-wide ground_primekg: sources with a fixed curie rule or a mapping
+    table are handled per source group, grounders run once per unique name.
+    """
+    out = pd.Series(None, index=ids.index, dtype=object)
+    for source in sources.unique():
+        mask = sources == source
+        if source == 'NCBI':
+            out[mask] = to_curie(get_biomart_mapper().mapper['entrez'].map(ids[mask]), 'hgnc')
+        elif source == 'DrugBank':
+            out[mask] = to_curie(get_drugbank_mapper().mapper['drugbank'].map(ids[mask]), 'chebi')
+        elif source in CURIE_RULES:
+            out[mask] = apply_curie_rule(ids[mask], source)
+        elif source in ['MONDO_grouped', 'CTD']:
+            grounded = {n: ground_primekg(source, None, n) for n in names[mask].unique()}
+            out[mask] = names[mask].map(grounded)
+    return out
+
 class PrimeKGAdapter_NodeType(Enum):
     """
     Define types of nodes the adapter can provide.
@@ -186,8 +221,8 @@ class PrimeKGAdapter(Adapter):
         df = pd.read_csv(data).astype(str)
         df = df[df['display_relation']!='parent-child']
         df.columns = ['label', 'type', 'x_index', 'x_id', 'x_type', 'x_name', 'x_source', 'y_index', 'y_id', 'y_type', 'y_name', 'y_source']
-        df['head'] = df.apply(lambda x: ground_primekg(x['x_source'], x['x_id'], x['x_name']), axis=1)
-        df['tail'] = df.apply(lambda x: ground_primekg(x['y_source'], x['y_id'], x['y_name']), axis=1)
+        df['head'] = ground_primekg_column(df['x_source'], df['x_id'], df['x_name'])
+        df['tail'] = ground_primekg_column(df['y_source'], df['y_id'], df['y_name'])
         df = df[['head', 'tail', 'label', 'type']]
         df['label'] = df['label'].apply(LABEL_MAPPING.get)
         df['source'] = 'primekg'
@@ -0,0 +1,49 @@
+from functools import lru_cache
+from utils.str_utils import escape_text
+
+
+class PropertyProjector:
+    """
+    Projects a raw record dict onto a fixed field list in one pass: falsy
+    values other than the number 0 are dropped, strings are escaped, and with escape_lists every
+    string of a list value is escaped too. Build it with get_projector so
+    there is one instance per (label, fields, escape_lists).
+    """
+    __slots__ = ('label', 'fields', 'escape_lists')
+
+    def __init__(self, label:str, fields: tuple, escape_lists: bool = False):
+        self.label = label
+        self.fields = tuple(fields)
+        self.escape_lists = escape_lists
+
+    def __call__(self, properties: dict):
+        prop_dict = {}
+        get = properties.get
+        escape = escape_text
+        for field in self.fields:
+            f = get(field)
+            if f or (f == 0 and type(f) in (int, float)):
+                if isinstance(f, str):
+                    prop_dict[field] = escape(f)
+                elif self.escape_lists and isinstance(f, list):
+                    prop_dict[field] = [escape(t) for t in f]
+                else:
+                    prop_dict[field] = f
+        return prop_dict
+
+    def project_many(self, records):
+        """
+        Project a batch of record dicts.
+        """
+        return [self(r) for r in records]
+
+
+@lru_cache(maxsize=None)
+def _get_projector(label, fields, escape_lists):
+    return PropertyProjector(label, fields, escape_lists)
+
+def get_projector(label:str, fields, escape_lists: bool = False):
+    """
+    Shared PropertyProjector for (label, fields, escape_lists).
+    """
+    return _get_projector(label, tuple(fields), escape_lists)
@@ -5,13 +5,20 @@ from enum import Enum, auto
 from itertools import chain
 from biocypher._logger import logger
 from adapters import Adapter, Node, Edge
+from adapters.nodes import NodeRecord, fields_of
+from adapters.edges import EdgeRecord
 import gzip
+from bisect import bisect_right
+from operator import itemgetter
 import pubmed_parser as pp
 from utils.str_utils import escape_text
-from nltk.tokenize import sent_tokenize
+from utils.sentence_segmenter import get_segmenter
 
 logger.debug(f"Loading module {__name__}.")
 
+# sentence offsets index into title + TITLE_SEP + abstract, see document_text
+TITLE_SEP = '\n'
+
 class PubmedAdapter_NodeType(Enum):
     """
     Define types of nodes the adapter can provide.
@@ -44,6 +51,8 @@ class PubmedAdapter_Sentence_Field(Enum):
     """
     SENTID = 'sentid'
     TEXT = 'text'
+    CHAR_START = 'char_start'
+    CHAR_END = 'char_end'
 
 class PubmedAdapter_EdgeType(Enum):
     """
@@ -103,6 +112,7 @@ class PubmedAdapter(Adapter):
         self.nodes = None
         self.edges = None
         self.dicts = None
+        self.sentences = None
         
     
     def _set_types_and_fields(
@@ -225,9 +235,13 @@ class PubmedAdapter(Adapter):
         for edge in self.edges:
             yield (edge.get_id(), edge.get_source(), edge.get_target(), edge.get_label(), edge.get_properties())
 
-    def load_data(self, file:str):
+    def load_data(self, file:str, n_workers:int = 1):
         """
         Parse PubMed primary source
+
+        Args:
+            file: MEDLINE xml, optionally gzipped.
+            n_workers: processes used to split abstracts into sentences.
         """
         logger.info("Loading PubMed data from disk.")
         if file.endswith('gz'):
@@ -241,21 +255,62 @@ class PubmedAdapter(Adapter):
         author_list=True,
         reference_list=True,) # return list of dictionary
         self.dicts = dicts_out
+        self.segment_abstracts(n_workers=n_workers)
+        return self
+
+    def segment_abstracts(self, n_workers:int = 1):
+        """
+        Split all abstracts into sentence spans in one batch; get_nodes,
+        get_edges and iter_documents all reuse the result. Spans are keyed by
+        the abstract text, as a file can hold several versions of one pmid.
+        """
+        abstracts = list(dict.fromkeys(article.get('abstract') for article in self.dicts
+                                       if isinstance(article.get('abstract'), str)))
+        spans = get_segmenter().spans_many(abstracts, n_workers=n_workers)
+        self.sentences = dict(zip(abstracts, spans))
         return self
 
+    def sentence_spans(self, article):
+        """
+        (sentid, char_start, char_end) of the title and abstract sentences,
+        with offsets into document_text(article).
+        """
+        title = article['title'] or ''
+        _id = article['pmid']
+        abstract = article.get('abstract')
+        spans = [(f'pmid{_id}_0', 0, len(title))]
+        if not isinstance(abstract, str):
+            abstract_spans = []
+        elif self.sentences is not None and abstract in self.sentences:
+            abstract_spans = self.sentences[abstract]
+        else:
+            abstract_spans = get_segmenter().spans(abstract)
+        offset = len(title) + len(TITLE_SEP)
+        for i, (start, end) in enumerate(abstract_spans, start=1):
+            spans.append((f'pmid{_id}_{i}', offset + start, offset + end))
+        return spans
+
     def sentence_node(self, article):
         try:
-            sents = []
-            title = article['title']
-            sents.append(title)
-            _id = article['pmid']
-            abstract = article['abstract']
-            if isinstance(abstract, str):
-                sents += sent_tokenize(abstract)
-            for i, sent in enumerate(sents):
-                yield {'sentid': f'pmid{_id}_{i}', 'text':sent}
+            text = document_text(article)
+            for sentid, start, end in self.sentence_spans(article):
+                yield {'sentid': sentid, 'text': text[start:end], 'char_start': start, 'char_end': end}
         except KeyError:
-            return sents
+            return
+
+    def iter_documents(self):
+        """
+        Stream (pmid, text, spans) per loaded article, with text the
+        document_text and spans its sentence_spans, so a downstream step can
+        work on whole documents and map offsets back with locate_sentence.
+        """
+        if not self.dicts:
+            raise Exception('Please provide a pubmed xml, or run load_data first!')
+        for article in self.dicts:
+            try:
+                yield f"pmid{article['pmid']}", document_text(article), self.sentence_spans(article)
+            except KeyError:
+                continue
 
     def article_node(self, article):
         try:
@@ -316,122 +371,68 @@ class PubmedAdapter(Adapter):
         except KeyError:
             return []
 
-class PubmedArticle(Node):
+def document_text(article):
+    """
+    Title and abstract of an article joined by TITLE_SEP, the text sentence
+    offsets refer to. Articles without an abstract are just the title.
+    """
+    title = article['title'] or ''
+    abstract = article.get('abstract')
+    if isinstance(abstract, str) and abstract:
+        return title + TITLE_SEP + abstract
+    return title
+
+def locate_sentence(spans, start:int, end:int = None, starts=None):
+    """
+    Sentence id of the span in spans (sorted, as sentence_spans) containing
+    the character range [start, end), or None if it falls between sentences
+    or crosses a sentence boundary. O(log n): a binary search on the span
+    starts, or on starts (the list of span starts) if the caller keeps one
+    per document.
+    """
+    if starts is not None:
+        i = bisect_right(starts, start) - 1
+    else:
+        i = bisect_right(spans, start, key=itemgetter(1)) - 1
+    if i < 0:
+        return None
+    sentid, s_start, s_end = spans[i]
+    end = start + 1 if end is None else end
+    if start >= s_end or end > s_end:
+        return None
+    return sentid
+
+class PubmedArticle(NodeRecord):
     """
     PubMed article nodes
     """
-    def __init__(self, id:str=None, fields: list = None, properties: dict = None):
-        self.id = id
-        self.label = 'pubmed_article'
-        self.fields = self._generate_fields(fields)
-        self.properties = self._generate_properties(properties)
-    
-    def _generate_fields(self, fields):
-        if fields is not None:
-            return [i.value for i in PubmedAdapter_Article_Field]
-        else:
-            return fields
-    
-    def _generate_properties(self, properties):
-        prop_dict = {}
-        for field in self.fields:
-            f = properties.get(field)
-            if f:
-                if isinstance(f, str):
-                    prop_dict[field] = escape_text(f)
-                elif isinstance(f, list):
-                    prop_dict[field] = [escape_text(t) for t in f]
-                else:
-                    prop_dict[field] = properties.get(field)
-        return prop_dict
-
-class Sentence(Node):
+    __slots__ = ()
+    LABEL = 'pubmed_article'
+    FIELDS = fields_of(PubmedAdapter_Article_Field)
+    ESCAPE_LISTS = True
+
+class Sentence(NodeRecord):
     """
     PubMed sentence nodes
     """
-    def __init__(self, id:str=None, fields: list = None, properties: dict = None):
-        self.id = id
-        self.label = 'sentence'
-        self.fields = self._generate_fields(fields)
-        self.properties = self._generate_properties(properties)
-    
-    def _generate_fields(self, fields):
-        if fields is not None:
-            return [i.value for i in PubmedAdapter_Sentence_Field]
-        else:
-            return fields
-
-    def _generate_properties(self, properties):
-        prop_dict = {}
-        for field in self.fields:
-            f = properties.get(field)
-            if f:
-                if isinstance(f, str):
-                    prop_dict[field] = escape_text(f)
-                elif isinstance(f, list):
-                    prop_dict[field] = [escape_text(t) for t in f]
-                else:
-                    prop_dict[field] = properties.get(field)
-        
-        return prop_dict
+    __slots__ = ()
+    LABEL = 'sentence'
+    FIELDS = fields_of(PubmedAdapter_Sentence_Field)
+    ESCAPE_LISTS = True
 
 
-class PublishedIn(Edge):
+class PublishedIn(EdgeRecord):
     """
     published_in edges
     """
-    def __init__(self, source:str, target:str, id:str=None, fields: list = None, properties: dict = None):
-        self.id = id
-        self.source = source
-        self.target = target
-        self.label = "published_in"
-        self.fields = self._generate_fields(fields)
-        self.properties = self._generate_properties(properties)
-    
-    def _generate_fields(self, fields):
-        if fields is None:
-            return [i.value for i in PubmedAdapter_PublishedIn_EdgeField]
-        else:
-            return fields
-
-    def _generate_properties(self, properties):
-        prop_dict = {}
-        for field in self.fields:
-            f = properties.get(field)
-            if f:
-                if isinstance(f, str):
-                    prop_dict[field] = escape_text(f)
-                else:
-                    prop_dict[field] = properties.get(field)
-        
-        return prop_dict
+    __slots__ = ()
+    LABEL = "published_in"
+    FIELDS = fields_of(PubmedAdapter_PublishedIn_EdgeField)
 
-class ContainTerm(Edge):
+class ContainTerm(EdgeRecord):
     """
     contain_term edges
     """
-    def __init__(self, source:str, target:str, id:str=None, fields: list = None, properties: dict = None):
-        self.id = id
-        self.source = source
-        self.target = target
-        self.label = "contain_term"
-        self.fields = self._generate_fields(fields)
-        self.properties = self._generate_properties(properties)
-    
-    def _generate_fields(self, fields):
-        if fields is None:
-            return [i.value for i in PubmedAdapter_ContainTerm_EdgeField]
-        else:
-            return fields
-
-    def _generate_properties(self, properties):
-        prop_dict = {}
-        for field in self.fields:
-            f = properties.get(field)
-            if f:
-                if isinstance(f, str):
-                    prop_dict[field] = escape_text(f)
-                else:
-                    prop_dict[field] = properties.get(field)
-        
-        return prop_dict
+    __slots__ = ()
+    LABEL = "contain_term"
+    FIELDS = fields_of(PubmedAdapter_ContainTerm_EdgeField)
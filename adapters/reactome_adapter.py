@@ -5,8 +5,11 @@ from enum import Enum, auto
 from itertools import chain
 from biocypher._logger import logger
 from adapters import Adapter, Node, Edge
+from adapters.nodes import NodeRecord, fields_of
+from adapters.edges import EdgeRecord
 from utils.str_utils import escape_text
-from utils.mapper import biomart_mapper
+from utils.mapper import get_biomart_mapper
+from utils.curie_utils import apply_curie_rule
 import pandas as pd
 logger.debug(f"Loading module {__name__}.")
 
@@ -188,13 +191,13 @@ class ReactomeAdapter(Adapter):
             'hier': [],
             'pub2pathway': []
         }
-        mapper = biomart_mapper()
+        mapper = get_biomart_mapper()
 
         # data
         df = pd.read_csv(data, sep='\t', header=None)
         df.columns = ['id', 'name', 'Species']
         df = df[df['Species']=='Homo sapiens'][['id', 'name']]
-        df['id'] = df['id'].apply(lambda x: f'reactome:{x}')
+        df['id'] = apply_curie_rule(df['id'], 'reactome')
         df['description'] = df['name']
         df['source'] = 'reactome'
         self.data['nodes'] += list(df.drop_duplicates().dropna().to_dict(orient='index').values())
@@ -202,8 +205,8 @@ class ReactomeAdapter(Adapter):
         # pathway 2 gene
         df = pd.read_csv(rt2gene, sep='\t', header=None)
         df.columns = ['gene', 'id', 'url', 'name', 'evidence code', 'Species'] # ncbi to reactome
-        df['gene'] = df['gene'].apply(lambda x: mapper.get(str(x), 'entrez'))
-        df['id'] = df['id'].apply(lambda x: f'reactome:{x}')
+        df['gene'] = mapper.mapper['entrez'].map(df['gene'].astype(str))
+        df['id'] = apply_curie_rule(df['id'], 'reactome')
         rt2gene = df[df['Species']=='Homo sapiens'][['gene', 'id']]
         rt2gene['source'] = 'reactome'
         self.data['gene2pathway'] += list(rt2gene.dropna().drop_duplicates().to_dict(orient='index').values())
@@ -211,136 +214,50 @@ class ReactomeAdapter(Adapter):
         # hier
         conv_hier = pd.read_csv(hier, sep='\t', header=None)
         conv_hier.columns = ['tail', 'head']
-        conv_hier['tail'] = conv_hier['tail'].apply(lambda x: f'reactome:{x}')
-        conv_hier['head'] = conv_hier['head'].apply(lambda x: f'reactome:{x}')
+        conv_hier['tail'] = apply_curie_rule(conv_hier['tail'], 'reactome')
+        conv_hier['head'] = apply_curie_rule(conv_hier['head'], 'reactome')
         conv_hier['source'] = 'reactome'
         self.data['hier'] += list(conv_hier.dropna().drop_duplicates().to_dict(orient='index').values())
 
         # cite
         df = pd.read_csv(rt2pub, sep='\t', header=None)
         df.columns = ['id', 'pmid']
-        df['id'] = df['id'].apply(lambda x: f'reactome:{x}')
-        df['pmid'] = df['pmid'].apply(lambda x: f'pmid{x}')
+        df['id'] = apply_curie_rule(df['id'], 'reactome')
+        df['pmid'] = apply_curie_rule(df['pmid'], 'pmid')
         df['source'] = 'reactome'
         self.data['pub2pathway'] += list(df.dropna().drop_duplicates().to_dict(orient='index').values())
 
         return self
 
-class Pathway(Node):
+class Pathway(NodeRecord):
     """
     pathway nodes
     """
-    def __init__(self, id:str=None, fields: list = None, properties: dict = None):
-        self.id = id
-        self.label = 'pathway'
-        self.fields = self._generate_fields(fields)
-        self.properties = self._generate_properties(properties)
-    
-    def _generate_fields(self, fields):
-        if fields is not None:
-            return [i.value for i in ReactomeAdapter_Pathway_Field]
-        else:
-            return fields
-
-    def _generate_properties(self, properties):
-        prop_dict = {}
-        for field in self.fields:
-            f = properties.get(field)
-            if f:
-                if isinstance(f, str):
-                    prop_dict[field] = escape_text(f)
-                else:
-                    prop_dict[field] = properties.get(field)
-        
-        return prop_dict
+    __slots__ = ()
+    LABEL = 'pathway'
+    FIELDS = fields_of(ReactomeAdapter_Pathway_Field)
 
 
-class Hier(Edge):
+class Hier(EdgeRecord):
     """
     hierarchical_structure edges
     """
-    def __init__(self, source:str, target:str, id:str=None, fields: list = None, properties: dict = None):
-        self.id = id
-        self.source = source
-        self.target = target
-        self.label = "hierarchical_structure"
-        self.fields = self._generate_fields(fields)
-        self.properties = self._generate_properties(properties)
-    
-    def _generate_fields(self, fields):
-        if fields is None:
-            return [i.value for i in ReactomeAdapter_Hier_EdgeField]
-        else:
-            return fields
-
-    def _generate_properties(self, properties):
-        prop_dict = {}
-        for field in self.fields:
-            f = properties.get(field)
-            if f:
-                if isinstance(f, str):
-                    prop_dict[field] = escape_text(f)
-                else:
-                    prop_dict[field] = properties.get(field)
-        
-        return prop_dict
+    __slots__ = ()
+    LABEL = "hierarchical_structure"
+    FIELDS = fields_of(ReactomeAdapter_Hier_EdgeField)
 
-class ContainTerm(Edge):
+class ContainTerm(EdgeRecord):
     """
     contain_term edges
     """
-    def __init__(self, source:str, target:str, id:str=None, fields: list = None, properties: dict = None):
-        self.id = id
-        self.source = source
-        self.target = target
-        self.label = "contain_term"
-        self.fields = self._generate_fields(fields)
-        self.properties = self._generate_properties(properties)
-    
-    def _generate_fields(self, fields):
-        if fields is None:
-            return [i.value for i in ReactomeAdapter_ContainTerm_EdgeField]
-        else:
-            return fields
-
-    def _generate_properties(self, properties):
-        prop_dict = {}
-        for field in self.fields:
-            f = properties.get(field)
-            if f:
-                if isinstance(f, str):
-                    prop_dict[field] = escape_text(f)
-                else:
-                    prop_dict[field] = properties.get(field)
-        
-        return prop_dict
+    __slots__ = ()
+    LABEL = "contain_term"
+    FIELDS = fields_of(ReactomeAdapter_ContainTerm_EdgeField)
 
-class G2P(Edge):
+class G2P(EdgeRecord):
     """
     gene_to_pathway_association edges
     """
-    def __init__(self, source:str, target:str, id:str=None, fields: list = None, properties: dict = None):
-        self.id = id
-        self.source = source
-        self.target = target
-        self.label = "gene_to_pathway_association"
-        self.fields = self._generate_fields(fields)
-        self.properties = self._generate_properties(properties)
-    
-    def _generate_fields(self, fields):
-        if fields is None:
-            return [i.value for i in ReactomeAdapter_G2P_EdgeField]
-        else:
-            return fields
-
-    def _generate_properties(self, properties):
-        prop_dict = {}
-        for field in self.fields:
-            f = properties.get(field)
-            if f:
-                if isinstance(f, str):
-                    prop_dict[field] = escape_text(f)
-                else:
-                    prop_dict[field] = properties.get(field)
-        
-        return prop_dict
\ No newline at end of file
+    __slots__ = ()
+    LABEL = "gene_to_pathway_association"
+    FIELDS = fields_of(ReactomeAdapter_G2P_EdgeField)
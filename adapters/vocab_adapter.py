@@ -3,10 +3,17 @@
 import pyobo
 import string
 from enum import Enum, auto
-from itertools import chain
+from itertools import chain, islice
+from collections import deque
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
 from biocypher._logger import logger
 from adapters import Adapter, Node, Edge
+from adapters.nodes import NodeRecord, fields_of
+from adapters.edges import EdgeRecord
 from utils.str_utils import escape_text
+from utils.ontology_snapshot import get_ontology_snapshot, SNAPSHOT_DIR
+from utils.curie_utils import to_curie, split_curie
 import pandas as pd
 
 logger.debug(f"Loading module {__name__}.")
@@ -20,15 +27,84 @@ PREFIXES = {
     'mesh_term': ['mesh']
 }
 
+TARGET_PREFIXES = set([j for i in PREFIXES.values() for j in i])
+OM_PREFIX_ALIASES = {'hugo.owl#hgnc': 'hgnc'} # special rules for hgnc
+
 def get_om_curie(id):
-    target_prefixes = set([j for i in PREFIXES.values() for j in i])
     lst = id.split('_')
     if len(lst)==2:
-        if lst[0]=='hugo.owl#hgnc': # special rules for hgnc
-            lst[0] = 'hgnc'
-        if lst[0].lower() in target_prefixes:
+        lst[0] = OM_PREFIX_ALIASES.get(lst[0], lst[0])
+        if lst[0].lower() in TARGET_PREFIXES:
             return f"{lst[0].lower()}:{lst[1]}"
 
+def get_om_curies(ids: pd.Series):
+    """
+    Column-wide get_om_curie.
+    """
+    return split_curie(ids, delimiter='_', prefixes=TARGET_PREFIXES, aliases=OM_PREFIX_ALIASES, n_parts=2)
+
+def extract_ontology(args, parts: tuple=('nodes', 'edges')):
+    """
+    Parse one ontology prefix into node and edge dicts. Parts that are not
+    requested are returned as None. Runs in worker processes, so it must stay
+    at module level.
+    """
+    n, prefix, snapshot_dir = args
+    logger.debug(f"Extracting {prefix} as {n}")
+    if snapshot_dir:
+        onto = get_ontology_snapshot(prefix, snapshot_dir=snapshot_dir)
+    else:
+        onto = pyobo.get_ontology(prefix)
+    nodes, edges = None, None
+    if 'nodes' in parts:
+        # mapping = pyobo.get_id_name_mapping(prefix)
+        mapping = onto.get_id_name_mapping()
+        # synonyms = pyobo.get_id_synonyms_mapping(prefix)\
+        synonyms = onto.get_id_synonyms_mapping()
+        # descriptions = pyobo.get_id_definition_mapping(prefix)
+        descriptions = onto.get_id_definition_mapping()
+
+        nodes = []
+        for identifier, name in mapping.items():
+            curie = f'{prefix}:{identifier}'
+            dat = {
+                'curie': curie,
+                'label': n,
+                'name': name,
+                'synonyms': synonyms.get(identifier),
+                'description': descriptions.get(identifier)
+                              }
+            nodes.append(dat)
+
+    if 'edges' in parts:
+        df = onto.get_relations_df()
+        df.columns = ['head', 'rel_ns', 'type', 'source', 'tail']
+        df = df[df['source']==prefix]
+        df['head'] = to_curie(df['head'], prefix)
+        df['tail'] = to_curie(df['tail'], prefix)
+        edges = list(df.to_dict(orient='index').values())
+    return nodes, edges
+
+def iter_ontologies(jobs: list, n_workers: int=1, parts: tuple=('nodes', 'edges')):
+    """
+    Yield (nodes, edges) for every (node type, prefix, snapshot_dir) job in
+    job order. With n_workers > 1 each prefix is parsed in its own process and
+    only n_workers results are in flight, which bounds memory.
+    """
+    extract = partial(extract_ontology, parts=parts)
+    if n_workers <= 1:
+        for job in jobs:
+            yield extract(job)
+        return
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        jobs = iter(jobs)
+        pending = deque(executor.submit(extract, job) for job in islice(jobs, n_workers))
+        while pending:
+            result = pending.popleft().result()
+            for job in islice(jobs, 1):
+                pending.append(executor.submit(extract, job))
+            yield result
+
 class OntologyAdapter_NodeType(Enum):
     """
     Define types of nodes the adapter can provide.
@@ -106,6 +182,8 @@ class OntologyAdapter(Adapter):
         self.nodes = None
         self.edges = None
         self.data = None
+        self.jobs = None
+        self.n_workers = 1
 
     def _set_types_and_fields(
         self, node_types, node_fields, edge_types, edge_fields
@@ -147,8 +225,20 @@ class OntologyAdapter(Adapter):
         logger.info("Generating nodes.")
         if file:
             self.load_data(file=file)
-        elif not self.data:
+        elif not self.data and not self.jobs:
             raise Exception('Please provide a BERN2 annotation, or run load_data first!')
+        if self.data is None: # streaming, one ontology at a time
+            for nodes, _ in iter_ontologies(self.jobs, n_workers=self.n_workers, parts=('nodes',)):
+                for d in nodes:
+                    node = OBOConcept(
+                        id = d["curie"],
+                        label=d['label'],
+                        fields=self.node_fields,
+                        properties=d
+                    )
+                    yield (node.get_id(), node.get_label(), node.get_properties())
+                del nodes
+            return
         if not self.nodes:
             self.nodes = []
         
@@ -170,8 +260,19 @@ class OntologyAdapter(Adapter):
         logger.info("Generating edges.")
         if file:
             self.load_data(file=file)
-        elif not self.data:
+        elif not self.data and not self.jobs:
             raise Exception('Please provide a BERN2 annotation, or run load_data first!')
+        if self.data is None: # streaming, one ontology at a time
+            for _, edges in iter_ontologies(self.jobs, n_workers=self.n_workers, parts=('edges',)):
+                for d in edges:
+                    edge = Hier(
+                        source=d.get('head'),
+                        target=d.get('tail'),
+                        properties=d
+                    )
+                    yield (edge.get_id(), edge.get_source(), edge.get_target(), edge.get_label(), edge.get_properties())
+                del edges
+            return
         if not self.edges:
             self.edges = []
 
@@ -184,47 +285,38 @@ class OntologyAdapter(Adapter):
         for edge in self.edges:
             yield (edge.get_id(), edge.get_source(), edge.get_target(), edge.get_label(), edge.get_properties())
 
-    def load_data(self, prefiexes: dict=None):
+    def load_data(self, prefiexes: dict=None, snapshot_dir: str=SNAPSHOT_DIR, n_workers: int=1, stream: bool=False):
         """
         Parse obo ontology
+
+        Args:
+            prefiexes: node type to ontology prefixes, defaults to PREFIXES.
+            snapshot_dir: directory of cached ontology snapshots (see
+                utils.ontology_snapshot). None parses with pyobo every time.
+            n_workers: number of processes parsing prefixes concurrently.
+                At most n_workers ontologies are parsed or waiting to be
+                collected at any time.
+            stream: do not accumulate self.data; get_nodes and get_edges
+                extract and emit one ontology at a time instead, so memory is
+                bounded by the largest ontology. Each ontology is read once for
+                nodes and once for edges, which is cheap with snapshots.
         """
         logger.info("Parsing obo onotlogies")
         if not prefiexes:
              prefiexes = PREFIXES
+        self.jobs = [(n, prefix, snapshot_dir) for n in self.node_types for prefix in prefiexes.get(n, [])]
+        self.n_workers = n_workers
+        if stream:
+            self.data = None
+            return self
+
         self.data = {
             'nodes': [],
             'edges': []
         }
-        
-
-        for n in self.node_types:
-            if prefiexes.get(n):
-                for prefix in prefiexes.get(n):
-                    onto = pyobo.get_ontology(prefix)
-                    # mapping = pyobo.get_id_name_mapping(prefix)
-                    mapping = onto.get_id_name_mapping()
-                    # synonyms = pyobo.get_id_synonyms_mapping(prefix)\
-                    synonyms = onto.get_id_synonyms_mapping()
-                    # descriptions = pyobo.get_id_definition_mapping(prefix)
-                    descriptions = onto.get_id_definition_mapping()
-                    df = onto.get_relations_df()
-                    
-                    for identifier, name in mapping.items():
-                        curie = f'{prefix}:{identifier}'
-                        dat = {
-                            'curie': curie,
-                            'label': n,
-                            'name': name,
-                            'synonyms': synonyms.get(identifier),
-                            'description': descriptions.get(identifier)
-                                          }
-                        self.data['nodes'].append(dat)
-                    
-                    df.columns = ['head', 'rel_ns', 'type', 'source', 'tail']
-                    df = df[df['source']==prefix]
-                    df['head'] = df['head'].apply(lambda x: f'{prefix}:{x}')
-                    df['tail'] = df['tail'].apply(lambda x: f'{prefix}:{x}')
-                    self.data['edges'] += list(df.to_dict(orient='index').values())
+        for nodes, edges in iter_ontologies(self.jobs, n_workers=n_workers):
+            self.data['nodes'] += nodes
+            self.data['edges'] += edges
 
         return self
 
@@ -323,109 +415,56 @@ class OMAdapter(Adapter):
         for edge in self.edges:
             yield (edge.get_id(), edge.get_source(), edge.get_target(), edge.get_label(), edge.get_properties())
 
-    def load_data(self, data:str):
+    def load_data(self, data:str, chunksize:int = None):
         """
         Parse processed Ontology Mapping
+
+        Args:
+            data: ontology mapping csv (head, tail, type, score, source).
+            chunksize: read the csv in chunks of this many rows, so only the
+                mapped rows of each chunk are kept in memory.
         """
         logger.info("Loading OM from disk.")
         self.data = []
 
         # data
-        df = pd.read_csv(data)
-        df = pd.read_csv('/nfs/turbo/umms-drjieliu/usr/xinyubao/umls_matching/database/mappings_without_dup.csv')
-        df.columns = ['head', 'tail', 'type', 'score', 'source']
-        df['head'] = df['head'].apply(get_om_curie)
-        df['tail'] = df['tail'].apply(get_om_curie)
-        df = df[['head', 'tail', 'score', 'source']]
-        self.data += list(df.drop_duplicates().dropna().to_dict(orient='index').values())
+        if chunksize:
+            df = pd.concat([self._process_chunk(c) for c in pd.read_csv(data, chunksize=chunksize)], ignore_index=True)
+        else:
+            df = self._process_chunk(pd.read_csv(data))
+        self.data += list(df.drop_duplicates().to_dict(orient='index').values())
         return self
 
-class OBOConcept(Node):
+    def _process_chunk(self, df):
+        df.columns = ['head', 'tail', 'type', 'score', 'source']
+        df['head'] = get_om_curies(df['head'])
+        df['tail'] = get_om_curies(df['tail'])
+        return df[['head', 'tail', 'score', 'source']].dropna()
+
+class OBOConcept(NodeRecord):
     """
     obo concept nodes
     """
+    __slots__ = ('label',)
+    FIELDS = fields_of(OntologyAdapter_Field)
+    ESCAPE_LISTS = True
+
     def __init__(self, label:str, id:str=None, fields: list = None, properties: dict = None):
-        self.id = id
         self.label = label
-        self.fields = self._generate_fields(fields)
-        self.properties = self._generate_properties(properties)
-    
-    def _generate_fields(self, fields):
-        if fields is not None:
-            return [i.value for i in OntologyAdapter_Field]
-        else:
-            return fields
-
-    def _generate_properties(self, properties):
-        prop_dict = {}
-        for field in self.fields:
-            f = properties.get(field)
-            if f:
-                if isinstance(f, str):
-                    prop_dict[field] = escape_text(f)
-                elif isinstance(f, list):
-                    prop_dict[field] = [escape_text(t) for t in f]
-                else:
-                    prop_dict[field] = properties.get(field)
-        
-        return prop_dict
+        super().__init__(id=id, fields=fields, properties=properties)
 
-class Hier(Edge):
+class Hier(EdgeRecord):
     """
     hierarchical_structure edges
     """
-    def __init__(self, source:str, target:str, id:str=None, fields: list = None, properties: dict = None):
-        self.id = id
-        self.source = source
-        self.target = target
-        self.label = "hierarchical_structure"
-        self.fields = self._generate_fields(fields)
-        self.properties = self._generate_properties(properties)
-    
-    def _generate_fields(self, fields):
-        if fields is None:
-            return [i.value for i in OntologyAdapter_Hier_EdgeField]
-        else:
-            return fields
-
-    def _generate_properties(self, properties):
-        prop_dict = {}
-        for field in self.fields:
-            f = properties.get(field)
-            if f:
-                if isinstance(f, str):
-                    prop_dict[field] = escape_text(f)
-                else:
-                    prop_dict[field] = properties.get(field)
-        
-        return prop_dict
+    __slots__ = ()
+    LABEL = "hierarchical_structure"
+    FIELDS = fields_of(OntologyAdapter_Hier_EdgeField)
 
-class OM(Edge):
+class OM(EdgeRecord):
     """
     ontology_mapping edges
     """
-    def __init__(self, source:str, target:str, id:str=None, fields: list = None, properties: dict = None):
-        self.id = id
-        self.source = source
-        self.target = target
-        self.label = "ontology_mapping"
-        self.fields = self._generate_fields(fields)
-        self.properties = self._generate_properties(properties)
-    
-    def _generate_fields(self, fields):
-        if fields is None:
-            return [i.value for i in OMAdapter_OM_EdgeField]
-        else:
-            return fields
-
-    def _generate_properties(self, properties):
-        prop_dict = {}
-        for field in self.fields:
-            f = properties.get(field)
-            if f:
-                if isinstance(f, str):
-                    prop_dict[field] = escape_text(f)
-                else:
-                    prop_dict[field] = properties.get(field)
-        
-        return prop_dict
\ No newline at end of file
+    __slots__ = ()
+    LABEL = "ontology_mapping"
+    FIELDS = fields_of(OMAdapter_OM_EdgeField)
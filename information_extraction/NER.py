@@ -1,5 +1,6 @@
 import sys
 import os
+import functools
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__))))
 from transformers import AutoTokenizer, AutoModelForTokenClassification
 from transformers import pipeline
@@ -10,8 +11,36 @@ from gilda_grounders import (
 )
 import openai
 
+GROUNDER_DIR = '/nfs/turbo/umms-drjieliu/proj/medlineKG/data/gilda_vocab/custom_grounders'
+
+def build_grounders(use_local_grounders=True, rsid_index=None):
+    """
+    Grounders by entity type, without loading any NER model
+    """
+    if use_local_grounders:
+        return {
+            'gene': Gene_Grounder(prefixes=None, file=f'{GROUNDER_DIR}/gene.json'),
+            'disease': Disease_Grounder(prefixes=None, file=f'{GROUNDER_DIR}/disease.json'),
+            'chemical': Chemical_Grounder(prefixes=None, file=f'{GROUNDER_DIR}/chemical.json'),
+            'organism': Organism_Grounder(prefixes=None, file=f'{GROUNDER_DIR}/organism.json'),
+            'anatomical': Anatomy_Grounder(prefixes=None, file=f'{GROUNDER_DIR}/anatomy.json'),
+            'cell_type': Anatomy_Grounder(prefixes=None, file=f'{GROUNDER_DIR}/anatomy.json'),
+            'cell_line': Anatomy_Grounder(prefixes=None, file=f'{GROUNDER_DIR}/anatomy.json'),
+            'variant': Variant_Grounder(index=rsid_index),
+        }
+    return {
+        'gene': Gene_Grounder(),
+        'disease': Disease_Grounder(),
+        'chemical': Chemical_Grounder(),
+        'organism': Organism_Grounder(),
+        'anatomical': Anatomy_Grounder(),
+        'cell_type': Anatomy_Grounder(),
+        'cell_line': Anatomy_Grounder(),
+        'variant': Variant_Grounder(index=rsid_index),
+    }
+
 class BiomedicalNER:
-    def __init__(self, use_local_grounders=True):
+    def __init__(self, use_local_grounders=True, rsid_index=None, load_grounders=True, device=None):
         # Initialize tokenizers and models for all entity types
         self.models = {
             'gene': "pruas/BENT-PubMedBERT-NER-Gene",
@@ -24,29 +53,8 @@ class BiomedicalNER:
             'organism': "pruas/BENT-PubMedBERT-NER-Organism"
         }
         
-        # Initialize grounders
-        if use_local_grounders:
-            self.grounders = {
-                'gene': Gene_Grounder(prefixes=None, file='/nfs/turbo/umms-drjieliu/proj/medlineKG/data/gilda_vocab/custom_grounders/gene.json'),
-                'disease': Disease_Grounder(prefixes=None, file='/nfs/turbo/umms-drjieliu/proj/medlineKG/data/gilda_vocab/custom_grounders/disease.json'),
-                'chemical': Chemical_Grounder(prefixes=None, file='/nfs/turbo/umms-drjieliu/proj/medlineKG/data/gilda_vocab/custom_grounders/chemical.json'),
-                'organism': Organism_Grounder(prefixes=None, file='/nfs/turbo/umms-drjieliu/proj/medlineKG/data/gilda_vocab/custom_grounders/organism.json'),
-                'anatomical': Anatomy_Grounder(prefixes=None, file='/nfs/turbo/umms-drjieliu/proj/medlineKG/data/gilda_vocab/custom_grounders/anatomy.json'),
-                'cell_type': Anatomy_Grounder(prefixes=None, file='/nfs/turbo/umms-drjieliu/proj/medlineKG/data/gilda_vocab/custom_grounders/anatomy.json'),
-                'cell_line': Anatomy_Grounder(prefixes=None, file='/nfs/turbo/umms-drjieliu/proj/medlineKG/data/gilda_vocab/custom_grounders/anatomy.json'),
-                'variant': Variant_Grounder(),
-            }
-        else:
-            self.grounders = {
-                'gene': Gene_Grounder(),
-                'disease': Disease_Grounder(),
-                'chemical': Chemical_Grounder(),
-                'organism': Organism_Grounder(),
-                'anatomical': Anatomy_Grounder(),
-                'cell_type': Anatomy_Grounder(),
-                'cell_line': Anatomy_Grounder(),
-                'variant': Variant_Grounder(),
-            }
+        # Initialize grounders; NER-only workers skip them with load_grounders=False
+        self.grounders = build_grounders(use_local_grounders, rsid_index) if load_grounders else {}
         
         # Initialize NER pipelines
         self.pipelines = {}
@@ -54,11 +62,18 @@ class BiomedicalNER:
             try:
                 tokenizer = AutoTokenizer.from_pretrained(model_name)
                 model = AutoModelForTokenClassification.from_pretrained(model_name)
-                self.pipelines[entity_type] = pipeline("ner", model=model, tokenizer=tokenizer)
+                self.pipelines[entity_type] = pipeline("ner", model=model, tokenizer=tokenizer, device=device)
             except Exception as e:
                 print(f"Warning: Failed to load {entity_type} model: {str(e)}")
         
-        self.client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self._client = None
+
+    @property
+    def client(self):
+        # created on first use so NER without LLM evaluation needs no API key
+        if self._client is None:
+            self._client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        return self._client
 
     def ground_entity(self, text, entity_type):
         """
@@ -70,6 +85,47 @@ class BiomedicalNER:
         terms = self.grounders[entity_type].ground(text)
         return [(m.term.get_curie(), m.score) for m in terms]
 
+    def _types_to_extract(self, entity_types):
+        if entity_types == 'all':
+            return list(self.pipelines.keys())
+        elif isinstance(entity_types, str):
+            return [entity_types]
+        return entity_types
+
+    def merge_tokens(self, text, ner_results, confidence_threshold=0.5):
+        """
+        Merge adjacent token predictions above the threshold into entity spans
+        """
+        filtered_results = [r for r in ner_results if r['score'] > confidence_threshold]
+        entities = []
+        i = 0
+        while i < len(filtered_results):
+            current = filtered_results[i]
+            entity = current['word']
+            start = current['start']
+            end = current['end']
+            scores = [current['score']]
+            
+            j = i + 1
+            while j < len(filtered_results):
+                next_token = filtered_results[j]
+                if next_token['start'] == end or next_token['start'] == end + 1:
+                    entity = text[start:next_token['end']]
+                    end = next_token['end']
+                    scores.append(next_token['score'])
+                    j += 1
+                else:
+                    break
+            
+            entities.append({
+                'entity': entity,
+                'start': start,
+                'end': end,
+                'score': round(sum(scores) / len(scores), 3)
+            })
+            i = j if j > i + 1 else i + 1
+        return entities
+
     def extract_entities(self, text, entity_types='all', confidence_threshold=0.5, ground_entities=True, evaluate_with_llm=False):
         """
         Extract and optionally ground entities from input text
@@ -83,15 +139,7 @@ class BiomedicalNER:
         """
         results = {}
         
-        # Determine which entity types to extract
-        if entity_types == 'all':
-            types_to_extract = self.pipelines.keys()
-        elif isinstance(entity_types, str):
-            types_to_extract = [entity_types]
-        else:
-            types_to_extract = entity_types
-            
-        for entity_type in types_to_extract:
+        for entity_type in self._types_to_extract(entity_types):
             if entity_type not in self.pipelines:
                 print(f"Warning: Entity type '{entity_type}' not available")
                 continue
@@ -99,34 +147,8 @@ class BiomedicalNER:
             try:
                 ner_results = self.pipelines[entity_type](text)
                 entities = []
-                
-                filtered_results = [r for r in ner_results if r['score'] > confidence_threshold]
-                
-                i = 0
-                while i < len(filtered_results):
-                    current = filtered_results[i]
-                    entity = current['word']
-                    start = current['start']
-                    end = current['end']
-                    scores = [current['score']]
-                    
-                    j = i + 1
-                    while j < len(filtered_results):
-                        next_token = filtered_results[j]
-                        if next_token['start'] == end or next_token['start'] == end + 1:
-                            entity = text[start:next_token['end']]
-                            end = next_token['end']
-                            scores.append(next_token['score'])
-                            j += 1
-                        else:
-                            break
-                    
-                    entity_info = {
-                        'entity': entity,
-                        'start': start,
-                        'end': end,
-                        'score': round(sum(scores) / len(scores), 3)
-                    }
+                for entity_info in self.merge_tokens(text, ner_results, confidence_threshold):
+                    entity = entity_info['entity']
                     if evaluate_with_llm and entity_info['score'] < 0.9:
                         correct = self.evaluate_ner_with_llm(text, entity, entity_type)
                     else:
@@ -139,7 +161,6 @@ class BiomedicalNER:
                             entity_info['groundings'] = groundings
                     if correct:
                         entities.append(entity_info)
-                    i = j if j > i + 1 else i + 1
                     
                 results[entity_type] = entities
                 
@@ -147,7 +168,52 @@ class BiomedicalNER:
                 print(f"Error extracting {entity_type} entities: {str(e)}")
                 
         return results
+
+    def extract_entities_many(self, texts, entity_types='all', confidence_threshold=0.5, batch_size=32):
+        """
+        Batch version of extract_entities without grounding or LLM evaluation:
+        each model runs once over the whole list of texts. Errors of a model
+        are raised, not skipped, so callers never get partial results.
+        Returns:
+            list: one {entity_type: [entities]} dict per text, in order
+        """
+        results = [{} for _ in texts]
+        if not texts:
+            return results
+        for entity_type in self._types_to_extract(entity_types):
+            if entity_type not in self.pipelines:
+                print(f"Warning: Entity type '{entity_type}' not available")
+                continue
+            batch_results = self.pipelines[entity_type](list(texts), batch_size=batch_size)
+            for res, text, ner_results in zip(results, texts, batch_results):
+                res[entity_type] = self.merge_tokens(text, ner_results, confidence_threshold)
+        return results
     
+    def extract_to_parquet(self, documents, path, entity_types='all', confidence_threshold=0.5, ground_entities=True, batch_size=32):
+        """
+        Run batched NER over documents and write the mentions to a Parquet
+        file, see ner_pipeline.write_parquet for the columns
+        Args:
+            documents: iterable of (doc_id, [(sentence_id, text), ...])
+            path (str): output .parquet file
+        Returns:
+            int: number of mentions written
+        """
+        from information_extraction.ner_pipeline import GROUND_CACHE_SIZE, batch_documents, to_records, write_parquet
+
+        @functools.lru_cache(maxsize=GROUND_CACHE_SIZE)
+        def ground(text, entity_type):
+            if not ground_entities:
+                return []
+            return self.ground_entity(text, entity_type)
+
+        def records():
+            for docs in batch_documents(documents, batch_size):
+                texts = [text for _, sents in docs for _, text in sents]
+                entities = self.extract_entities_many(texts, entity_types, confidence_threshold, batch_size=batch_size)
+                yield from to_records(docs, entities, ground)
+        return write_parquet(records(), path)
+
     def evaluate_ner_with_llm(self, sentence, mention, entity_type):
         # Prompt LLM to check if the mention is a correct extraction for the entity in the sentence
         prompt = (
@@ -4,6 +4,7 @@ from gilda import Term, make_grounder
 from gilda.process import normalize
 from tqdm.auto import tqdm
 from biocypher._logger import logger
+from utils.rsid_index import RsidIndex, rsid_to_int
 import json
 
 logger.debug(f"Loading module {__name__}.")
@@ -205,8 +206,18 @@ class Organism_Grounder(Custom_Grounder):
 
 # Add to existing grounders
 class Variant_Grounder:
-    def __init__(self):
+    def __init__(self, index:str = None):
+        """
+        Args:
+            index: optional directory of an rsID index built with
+                adapters.dbsnp_adapter.build_rsid_index. When given, only
+                rsIDs present in dbSNP are grounded and matches carry ref/alt.
+        """
         self.rs_prefix = "rs"
+        self.index = None
+        if index:
+            self.index = RsidIndex(index)
+            logger.debug(f"Loaded rsID index with {len(self.index):,} variants")
         
     def ground(self, text):
         """
@@ -220,18 +231,25 @@ class Variant_Grounder:
                 self.score = score
                 
         class VariantTerm:
-            def __init__(self, id):
+            def __init__(self, id, ref=None, alt=None):
                 self.id = id
+                self.ref = ref
+                self.alt = alt
                 
             def get_curie(self):
                 return f"{self.id}"
                 
         # Check if text matches RSID pattern (case insensitive)
         text = text.lower().strip()
-        if text.startswith('rs') and text[2:].isdigit():
-            # Create a match with the RSID
-            term = VariantTerm(text)
-            return [VariantMatch(term, 1.0)]
+        if rsid_to_int(text) is not None:
+            if self.index is None:
+                # Create a match with the RSID
+                term = VariantTerm(text)
+                return [VariantMatch(term, 1.0)]
+            # validate against dbSNP, O(log n) on the memory-mapped index
+            if text in self.index:
+                alleles = self.index.get_alleles(text) or (None, None)
+                term = VariantTerm(text, *alleles)
+                return [VariantMatch(term, 1.0)]
         
         return []
-
@@ -0,0 +1,408 @@
+import os
+import json
+import gzip
+import atexit
+import queue
+import threading
+import functools
+import multiprocessing as mp
+from biocypher._logger import logger
+
+try:
+    import pyarrow as pa
+    MENTION_SCHEMA = pa.schema([
+        ('pmid', pa.string()),
+        ('sentid', pa.string()),
+        ('type', pa.string()),
+        ('entity', pa.string()),
+        ('start', pa.int32()),
+        ('end', pa.int32()),
+        ('score', pa.float64()),
+        ('grounding_curies', pa.list_(pa.string())),
+        ('grounding_scores', pa.list_(pa.float64())),
+    ])
+except ImportError: # only needed for the Parquet format
+    MENTION_SCHEMA = None
+
+# PubMed sentences -> batched NER workers -> grounding workers -> mention records.
+# Every stage is connected by a bounded queue, so a slow stage blocks the one
+# feeding it instead of letting batches pile up in memory.
+
+GROUND_CACHE_SIZE = 100000 # distinct (text, type) groundings kept per grounding worker
+
+
+def pubmed_documents(file:str, n_workers:int = 1):
+    """
+    Stream (pmid, [(sentid, sentence text), ...]) for the articles of a
+    MEDLINE xml, with the sentence ids the PubmedAdapter gives its nodes.
+    """
+    from adapters.pubmed_adapter import PubmedAdapter
+    adapter = PubmedAdapter().load_data(file, n_workers=n_workers)
+    for pmid, text, spans in adapter.iter_documents():
+        yield pmid, [(sentid, text[start:end]) for sentid, start, end in spans]
+
+
+def batch_documents(documents, batch_size:int = 32):
+    """
+    Group documents into batches of at least batch_size sentences, never
+    splitting a document, so each batch comes back as complete records.
+    """
+    batch, n_sents = [], 0
+    for pmid, sents in documents:
+        batch.append((pmid, sents))
+        n_sents += len(sents)
+        if n_sents >= batch_size:
+            yield batch
+            batch, n_sents = [], 0
+    if batch:
+        yield batch
+
+
+def to_records(docs, entities, ground):
+    """
+    NER records of a batch of documents.
+
+    Args:
+        docs: list of (pmid, [(sentid, text), ...]).
+        entities: one extract_entities_many result per sentence, in order.
+        ground: callable (text, entity_type) -> [(curie, score), ...].
+    """
+    records = []
+    it = iter(entities)
+    for pmid, sents in docs:
+        mentions = []
+        for sentid, _ in sents:
+            for entity_type, ents in next(it).items():
+                for ent in ents:
+                    mentions.append({
+                        'sentid': sentid,
+                        'type': entity_type,
+                        'entity': ent['entity'],
+                        'start': ent['start'],
+                        'end': ent['end'],
+                        'score': ent['score'],
+                        'groundings': ground(ent['entity'], entity_type),
+                    })
+        records.append({'pmid': pmid, 'mentions': mentions})
+    return records
+
+
+def _ner_worker(in_q, out_q, entity_types, confidence_threshold, batch_size):
+    from information_extraction.NER import BiomedicalNER
+    from utils.profiling import install_from_env
+    install_from_env()
+    ner = BiomedicalNER(load_grounders=False)
+    while True:
+        item = in_q.get()
+        if item is None:
+            break
+        batch_id, docs = item
+        texts = [text for _, sents in docs for _, text in sents]
+        failed = []
+        try:
+            entities = ner.extract_entities_many(texts, entity_types, confidence_threshold, batch_size=batch_size)
+        except Exception as e:
+            # retry one document at a time, so only the documents that fail are lost
+            logger.warning(f"NER failed on batch {batch_id}, retrying per document: {e}")
+            ok, entities = [], []
+            for pmid, sents in docs:
+                try:
+                    entities += ner.extract_entities_many([text for _, text in sents], entity_types,
+                                                          confidence_threshold, batch_size=batch_size)
+                    ok.append((pmid, sents))
+                except Exception as e:
+                    logger.error(f"NER failed on {pmid}: {e}")
+                    failed.append((pmid, f'{type(e).__name__}: {e}'))
+            docs = ok
+        out_q.put((batch_id, docs, entities, failed))
+
+
+def _ground_worker(in_q, out_q, use_local_grounders, rsid_index):
+    from information_extraction.NER import build_grounders
+    from utils.profiling import install_from_env
+    install_from_env()
+    grounders = build_grounders(use_local_grounders, rsid_index)
+
+    @functools.lru_cache(maxsize=GROUND_CACHE_SIZE)
+    def ground(text, entity_type):
+        grounder = grounders.get(entity_type)
+        try:
+            return [(m.term.get_curie(), m.score) for m in grounder.ground(text)] if grounder else []
+        except Exception as e:
+            logger.warning(f"Grounding {text!r} as {entity_type} failed: {e}")
+            return []
+
+    while True:
+        item = in_q.get()
+        if item is None:
+            break
+        batch_id, docs, entities, failed = item
+        out_q.put((batch_id, to_records(docs, entities, ground), failed))
+
+
+class NERStage:
+    """
+    Pool of NER and grounding worker processes that stay alive across
+    input files, so the models are loaded once per worker.
+
+    Args:
+        n_ner_workers: processes running the NER models.
+        n_ground_workers: processes running the grounders.
+        batch_size: sentences per NER batch.
+        queue_size: batches buffered between two stages.
+        entity_types: passed to BiomedicalNER.extract_entities_many.
+        confidence_threshold: minimum token score.
+        use_local_grounders, rsid_index: passed to build_grounders.
+    """
+    def __init__(self, n_ner_workers:int = 1, n_ground_workers:int = 1, batch_size:int = 32,
+                 queue_size:int = 8, entity_types='all', confidence_threshold:float = 0.5,
+                 use_local_grounders:bool = True, rsid_index:str = None):
+        self.n_ner_workers = n_ner_workers
+        self.n_ground_workers = n_ground_workers
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.entity_types = entity_types
+        self.confidence_threshold = confidence_threshold
+        self.use_local_grounders = use_local_grounders
+        self.rsid_index = rsid_index
+        self.ner_workers = []
+        self.ground_workers = []
+        self.runs = 0
+
+    def start(self):
+        if self.ner_workers:
+            return self
+        ctx = mp.get_context('spawn') # no torch state forked into the workers
+        self.sent_q = ctx.Queue(maxsize=self.queue_size)
+        self.ground_q = ctx.Queue(maxsize=self.queue_size)
+        self.out_q = ctx.Queue(maxsize=self.queue_size)
+        self.ner_workers = [
+            ctx.Process(target=_ner_worker, daemon=True,
+                        args=(self.sent_q, self.ground_q, self.entity_types, self.confidence_threshold, self.batch_size))
+            for _ in range(self.n_ner_workers)
+        ]
+        self.ground_workers = [
+            ctx.Process(target=_ground_worker, daemon=True,
+                        args=(self.ground_q, self.out_q, self.use_local_grounders, self.rsid_index))
+            for _ in range(self.n_ground_workers)
+        ]
+        for p in self.ner_workers + self.ground_workers:
+            p.start()
+        logger.info(f"Started {self.n_ner_workers} NER and {self.n_ground_workers} grounding workers.")
+        return self
+
+    def _receive(self, run_id):
+        """
+        (records, failed) of the next batch of run run_id, or None if nothing
+        arrived in time. Batches of an earlier run are dropped.
+        """
+        try:
+            (batch_run, _), records, failed = self.out_q.get(timeout=0.5)
+        except queue.Empty:
+            if not all(p.is_alive() for p in self.ner_workers + self.ground_workers):
+                raise RuntimeError('A NER pipeline worker died.')
+            return None
+        if batch_run != run_id:
+            return None
+        return records, failed
+
+    def run(self, documents):
+        """
+        Stream NER records, one {'pmid', 'mentions'} dict per document.
+        Records come back per batch as soon as they are grounded, so their
+        order may differ from the input order. Raises RuntimeError at the end
+        if NER failed on any document, after the others have been yielded.
+        If the caller stops early, the batches in flight are received and
+        dropped before the generator closes.
+        """
+        self.start()
+        self.runs += 1
+        run_id = self.runs # batch ids are (run_id, batch number)
+        state = {'sent': 0, 'done': False, 'stop': False, 'error': None}
+
+        def put(item):
+            # blocks while the NER workers are busy, unless the run is stopped
+            while not state['stop']:
+                try:
+                    self.sent_q.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def feed():
+            try:
+                for batch_id, batch in enumerate(batch_documents(documents, self.batch_size)):
+                    if not put(((run_id, batch_id), batch)):
+                        break
+                    state['sent'] += 1
+            except Exception as e:
+                state['error'] = e
+            state['done'] = True
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+        received = 0
+        failed = []
+        try:
+            while not (state['done'] and received == state['sent']):
+                batch = self._receive(run_id)
+                if batch is None:
+                    continue
+                received += 1
+                failed += batch[1]
+                yield from batch[0]
+        finally:
+            # closed early or failed: stop feeding and let the batches in
+            # flight through, so the next run starts on empty queues
+            state['stop'] = True
+            feeder.join()
+            try:
+                while received < state['sent']:
+                    if self._receive(run_id) is not None:
+                        received += 1
+            except RuntimeError:
+                pass # a worker died, nothing more will arrive
+        if state['error'] is not None:
+            raise state['error']
+        if failed:
+            raise RuntimeError(f"NER failed on {len(failed)} documents, e.g. {failed[0][0]}: {failed[0][1]}")
+
+    def close(self):
+        if not self.ner_workers:
+            return
+        for _ in self.ner_workers:
+            self.sent_q.put(None)
+        for p in self.ner_workers:
+            p.join()
+        for _ in self.ground_workers:
+            self.ground_q.put(None)
+        for p in self.ground_workers:
+            p.join()
+        self.ner_workers, self.ground_workers = [], []
+
+
+def write_jsonl(records, path:str):
+    """
+    Write NER records as JSON Lines, one document per line, gzipped if path
+    ends with .gz. The file is written under a temporary name and moved in
+    place at the end, so a partial run never leaves a truncated file.
+    Returns the number of records written.
+    """
+    opener = gzip.open if path.endswith('.gz') else open
+    tmp = path + '.tmp'
+    n = 0
+    with opener(tmp, 'wt', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write('\n')
+            n += 1
+    os.replace(tmp, path)
+    return n
+
+def read_jsonl(path:str):
+    """
+    Stream NER records from a JSON Lines file written by write_jsonl.
+    """
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def records_to_table(records):
+    """
+    Flatten NER records into an Arrow table with one row per mention and
+    the columns of MENTION_SCHEMA.
+    """
+    import pyarrow as pa
+    cols = {name: [] for name in MENTION_SCHEMA.names}
+    for record in records:
+        for m in record['mentions']:
+            cols['pmid'].append(record['pmid'])
+            cols['sentid'].append(m['sentid'])
+            cols['type'].append(m['type'])
+            cols['entity'].append(m['entity'])
+            cols['start'].append(m['start'])
+            cols['end'].append(m['end'])
+            cols['score'].append(m['score'])
+            groundings = m.get('groundings') or []
+            cols['grounding_curies'].append([g[0] for g in groundings])
+            cols['grounding_scores'].append([g[1] for g in groundings])
+    return pa.Table.from_pydict(cols, schema=MENTION_SCHEMA)
+
+def write_parquet(records, path:str, batch_records:int = 10000):
+    """
+    Write NER records as Parquet, one row per mention, converting and writing
+    batch_records documents at a time so memory stays bounded. Each batch is
+    one row group, whose min/max statistics let readers skip it. Written
+    under a hidden temporary name like write_jsonl, so readers of the
+    directory never pick up a partial file. Returns the number of mentions.
+    """
+    import pyarrow.parquet as pq
+    head, name = os.path.split(path)
+    tmp = os.path.join(head, f'.{name}.tmp')
+    n = 0
+    with pq.ParquetWriter(tmp, MENTION_SCHEMA, compression='zstd') as writer:
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_records:
+                table = records_to_table(batch)
+                writer.write_table(table)
+                n += table.num_rows
+                batch = []
+        if batch:
+            table = records_to_table(batch)
+            writer.write_table(table)
+            n += table.num_rows
+    os.replace(tmp, path)
+    return n
+
+def read_parquet(path:str, columns:list = None, min_score:float = None, types:list = None, filter=None, batch_size:int = 65536):
+    """
+    Stream mentions from Parquet NER files as dicts with the keys of a NER
+    record mention, reading only the given columns and only the rows passing
+    the filters; row groups that cannot match are skipped.
+
+    Args:
+        path: a Parquet file or a directory of them (its *.parquet files).
+        columns: MENTION_SCHEMA columns to read, all by default; grounding_curies
+            is read together with grounding_scores.
+        min_score: keep mentions with score >= min_score.
+        types: keep mentions whose type is in types.
+        filter: any further pyarrow.dataset expression.
+    """
+    import pyarrow.dataset as ds
+    expr = filter
+    if min_score is not None:
+        cond = ds.field('score') >= min_score
+        expr = cond if expr is None else expr & cond
+    if types is not None:
+        cond = ds.field('type').isin(list(types))
+        expr = cond if expr is None else expr & cond
+    if columns is not None and 'grounding_curies' in columns and 'grounding_scores' not in columns:
+        columns = list(columns) + ['grounding_scores']
+    if os.path.isdir(path):
+        path = sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith('.parquet'))
+    dataset = ds.dataset(path, format='parquet', schema=MENTION_SCHEMA)
+    for batch in dataset.to_batches(columns=columns, filter=expr, batch_size=batch_size):
+        for row in batch.to_pylist():
+            if 'grounding_curies' in row:
+                row['groundings'] = list(zip(row.pop('grounding_curies'), row.pop('grounding_scores', None) or []))
+            yield row
+
+
+_STAGE = None
+
+def get_ner_stage(**kwargs):
+    """
+    Process-wide NERStage, started on first use and closed at exit.
+    kwargs only apply to the first call.
+    """
+    global _STAGE
+    if _STAGE is None:
+        _STAGE = NERStage(**kwargs).start()
+        atexit.register(_STAGE.close)
+    return _STAGE
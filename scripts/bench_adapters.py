@@ -0,0 +1,152 @@
+import sys
+import os
+import csv
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import importlib
+import multiprocessing as mp
+from datetime import datetime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from synthetic_fixtures import FIXTURES, TABLES, tables
+
+# ingestion benchmark: each adapter's load_data + get_nodes + get_edges on
+# synthetic fixtures, one fresh process per adapter so peak RSS is its own.
+# Records are dumped to a delimited file to measure the bytes they produce.
+# Mapping tables and grounders the adapters load from /nfs are replaced by
+# synthetic ones (synthetic_fixtures.TABLES) in the child process.
+
+ADAPTERS = {
+    # name: (module, class, extra load_data arguments)
+    'pubmed': ('adapters.pubmed_adapter', 'PubmedAdapter', {}),
+    'journal': ('adapters.journal_adapter', 'JournalAdapter', {}),
+    'dbsnp': ('adapters.dbsnp_adapter', 'dbSNPAdapter', {'n_workers': 1}),
+    'reactome': ('adapters.reactome_adapter', 'ReactomeAdapter', {}),
+    'primekg': ('adapters.primekg_adapter', 'PrimeKGAdapter', {}),
+    'gwas': ('adapters.gwas_adapter', 'GWASAdapter', {}),
+    'om': ('adapters.vocab_adapter', 'OMAdapter', {}),
+}
+# fixture size per adapter relative to --size, roughly the row ratios of the real sources
+SCALE = {'pubmed': 1, 'journal': 1, 'dbsnp': 20, 'reactome': 0.2, 'primekg': 20, 'gwas': 2, 'om': 10}
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1e6 if sys.platform == 'darwin' else rss / 1e3
+
+def input_bytes(arg):
+    paths = arg.values() if isinstance(arg, dict) else [arg]
+    return sum(os.path.getsize(p) for p in paths)
+
+def drain(records, writer):
+    n = 0
+    for record in records or []:
+        *head, props = record
+        writer.writerow(list(head) + [json.dumps(props, ensure_ascii=False, default=str)])
+        n += 1
+    return n
+
+def install_tables(module, files:dict):
+    """
+    Load the process-wide mappers and the module's grounders from synthetic
+    files, under the /nfs keys the adapters look them up with.
+    """
+    from utils import mapper
+    for kind, file in files.items():
+        if kind == 'biomart':
+            mapper._MAPPERS[('biomart', mapper.BIOMART_FILE)] = mapper.biomart_mapper(file)
+        elif kind == 'drugbank':
+            mapper._MAPPERS[('drugbank', mapper.DRUGBANK_FILE)] = mapper.drugbank_mapper(file)
+        else: # gene, disease or chemical grounder
+            default = getattr(module, f'{kind.upper()}_GROUNDER_FILE')
+            module._GROUNDERS[default] = getattr(module, f'get_{kind}_grounder')(file)
+
+def run_adapter(name:str, arg, dump_path:str, table_files:dict = None):
+    """
+    Runs in a child process: times each step and counts what it produced.
+    """
+    module, cls_name, extra = ADAPTERS[name]
+    result = {'adapter': name, 'input_bytes': input_bytes(arg)}
+    try:
+        start = time.perf_counter()
+        module = importlib.import_module(module)
+        cls = getattr(module, cls_name)
+        result['import_s'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        install_tables(module, table_files or {})
+        result['tables_s'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        adapter = cls().load_data(**arg, **extra) if isinstance(arg, dict) else cls().load_data(arg, **extra)
+        result['load_s'] = time.perf_counter() - start
+
+        with open(dump_path, 'w', newline='') as f:
+            writer = csv.writer(f, delimiter='\t')
+            for part, fn in [('nodes', adapter.get_nodes), ('edges', adapter.get_edges)]:
+                start = time.perf_counter()
+                try:
+                    result[part] = drain(fn(), writer)
+                except StopIteration: # no records, as in build_kg
+                    result[part] = 0
+                result[f'{part}_s'] = time.perf_counter() - start
+        result['bytes_written'] = os.path.getsize(dump_path)
+        total = result['load_s'] + result['nodes_s'] + result['edges_s']
+        result['total_s'] = total
+        result['records_per_s'] = (result['nodes'] + result['edges']) / total if total else None
+    except Exception as e:
+        result['error'] = f'{type(e).__name__}: {e}'
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='adapter ingestion benchmark on synthetic fixtures')
+    parser.add_argument('--size', type=int, default=10000, help='base fixture size, scaled per adapter by SCALE')
+    parser.add_argument('--adapters', nargs='+', default=list(ADAPTERS), choices=list(ADAPTERS))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workdir', default=None, help='keep fixtures and dumps here instead of a temporary directory')
+    parser.add_argument('--out', default=None, help='JSON report path, stdout if not given')
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    workdir = args.workdir or tempfile.mkdtemp(prefix='bench_adapters_')
+    os.makedirs(workdir, exist_ok=True)
+    ctx = mp.get_context('spawn')
+    report = {'date': datetime.now().isoformat(timespec='seconds'), 'size': args.size, 'seed': args.seed, 'runs': []}
+    print(f"{'adapter':<10}{'n':>9}{'load s':>9}{'nodes':>10}{'edges':>10}{'rec/s':>11}{'MB out':>9}{'RSS MB':>9}", file=sys.stderr)
+    try:
+        for name in args.adapters:
+            n = max(1, int(args.size * SCALE[name]))
+            fixture_dir = os.path.join(workdir, name)
+            os.makedirs(fixture_dir, exist_ok=True)
+            start = time.perf_counter()
+            try:
+                arg = FIXTURES[name](fixture_dir, n, seed=args.seed)
+                table_files = tables(fixture_dir, TABLES.get(name, []), seed=args.seed)
+            except ImportError as e: # e.g. gilda, needed for the grounder terms
+                print(f"{name:<10}{n:>9}  skipped: {type(e).__name__}: {e}", file=sys.stderr)
+                report['runs'].append({'adapter': name, 'n': n, 'error': f'{type(e).__name__}: {e}'})
+                continue
+            fixture_s = time.perf_counter() - start
+            with ctx.Pool(1) as pool:
+                result = pool.apply(run_adapter, (name, arg, os.path.join(fixture_dir, 'records.tsv'), table_files))
+            result.update({'n': n, 'fixture_s': fixture_s})
+            report['runs'].append(result)
+            if 'error' in result:
+                print(f"{name:<10}{n:>9}  skipped: {result['error']}", file=sys.stderr)
+            else:
+                print(f"{name:<10}{n:>9}{result['load_s']:>9.2f}{result['nodes']:>10}{result['edges']:>10}"
+                      f"{result['records_per_s']:>11,.0f}{result['bytes_written'] / 1e6:>9.1f}{result['peak_rss_mb']:>9.0f}", file=sys.stderr)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    out = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(out)
+    else:
+        print(out)
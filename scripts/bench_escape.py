@@ -0,0 +1,56 @@
+import sys
+import os
+import re
+import gzip
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pandas as pd
+from utils.str_utils import escape_text, escape_texts, escape_series
+
+# per-call vs. batch escaping on the titles and abstracts of a PubMed baseline file
+TEXT_TAGS = re.compile(r'<(ArticleTitle|AbstractText)[^>]*>(.*?)</\1>', re.S)
+REPEATS = 3
+ESCAPE_TABLE = str.maketrans({"\"": '""', "\\": "\\\\", ";": "\\;"})
+
+def read_texts(file:str):
+    opener = gzip.open if file.endswith('gz') else open
+    with opener(file, 'rt', encoding='utf-8') as f:
+        return [m.group(2) for m in TEXT_TAGS.finditer(f.read())]
+
+def synthetic_texts(n:int = 50000):
+    sent = 'BRCA1 (breast cancer 1; "early onset") mutations were studied in MCF-7 cells\\HeLa; p < 0.05. '
+    return [sent * (1 + i % 8) for i in range(n)]
+
+def per_call_escape(texts):
+    # escape_text before: a translation table built on every call
+    return [t.translate(str.maketrans({"\"": '""', "\\": "\\\\", ";": "\\;"})) for t in texts]
+
+def shared_table_escape(texts):
+    return [t.translate(ESCAPE_TABLE) for t in texts]
+
+def timed(fn, texts):
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(texts)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+if __name__ == "__main__":
+    # usage: python scripts/bench_escape.py [pubmed baseline .xml or .xml.gz]
+    texts = read_texts(sys.argv[1]) if len(sys.argv) > 1 else synthetic_texts()
+    n_chars = sum(len(t) for t in texts)
+    series = pd.Series(texts)
+    print(f"{len(texts):,} texts, {n_chars / 1e6:.1f}M characters, best of {REPEATS}")
+    methods = [
+        ('translate, table per call', per_call_escape, texts),
+        ('translate, shared table', shared_table_escape, texts),
+        ('escape_text per call', lambda ts: [escape_text(t) for t in ts], texts),
+        ('escape_texts batch', escape_texts, texts),
+        ('escape_series (pandas)', escape_series, series),
+    ]
+    assert per_call_escape(texts) == escape_texts(texts)
+    print(f"{'method':<28}{'seconds':>10}{'texts/s':>14}{'MB/s':>10}")
+    for name, fn, arg in methods:
+        t = timed(fn, arg)
+        print(f"{name:<28}{t:>10.3f}{len(texts) / t:>14,.0f}{n_chars / t / 1e6:>10.1f}")
@@ -0,0 +1,153 @@
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import platform
+import resource
+import multiprocessing as mp
+from datetime import datetime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import numpy as np
+
+# throughput/latency of BiomedicalNER over a grid of devices, thread counts,
+# entity-type subsets and batch sizes, on synthetic text unless a file with one
+# sentence per line is given. Runs offline once the models are in the Hugging
+# Face cache (export HF_HUB_OFFLINE=1). Every configuration runs in a fresh
+# process that loads the models itself, so its peak RSS is its own.
+
+GENES = ['BRCA1', 'TP53', 'EGFR', 'KRAS', 'PTEN', 'APOE', 'MYC', 'CDKN2A', 'IL6', 'TNF']
+DISEASES = ['breast cancer', 'type 2 diabetes', "Alzheimer's disease", 'asthma', 'colorectal cancer', 'hypertension']
+CHEMICALS = ['gefitinib', 'metformin', 'cisplatin', 'tamoxifen', 'doxorubicin', 'aspirin']
+CELLS = ['MCF-7 cells', 'HeLa cells', 'T cells', 'hepatocytes', 'HEK293 cells']
+ORGANISMS = ['mice', 'Escherichia coli', 'zebrafish', 'patients', 'rats']
+TEMPLATES = [
+    '{gene} mutations were associated with {disease} in {organism}.',
+    'Treatment of {cell} with {chemical} reduced {gene} expression by 40% (p < 0.05).',
+    'The variant rs{rsid} in {gene} is associated with response to {chemical}.',
+    'We studied the role of {gene} and {gene2} signaling in {disease} using {cell}.',
+    'In a cohort of 1,024 {organism}, {chemical} did not change the risk of {disease}.',
+    'Loss of {gene} promotes {disease} progression, whereas {gene2} overexpression in {cell} is protective.',
+]
+
+def synthetic_sentences(n:int, seed:int = 0):
+    """
+    n biomedical-looking sentences filled from fixed vocabularies, the same
+    for a given seed.
+    """
+    rng = random.Random(seed)
+    return [
+        rng.choice(TEMPLATES).format(
+            gene=rng.choice(GENES), gene2=rng.choice(GENES), disease=rng.choice(DISEASES),
+            chemical=rng.choice(CHEMICALS), cell=rng.choice(CELLS), organism=rng.choice(ORGANISMS),
+            rsid=rng.randint(1000, 99999999))
+        for _ in range(n)
+    ]
+
+def peak_rss_mb():
+    # ru_maxrss is in KB on Linux, bytes on macOS; peak of the whole process so far
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1e6 if sys.platform == 'darwin' else rss / 1e3
+
+def count_tokens(ner, texts):
+    tokenizer = next(iter(ner.pipelines.values())).tokenizer
+    return sum(len(ids) for ids in tokenizer(texts, add_special_tokens=False)['input_ids'])
+
+def bench_config(ner, texts, entity_types, batch_size:int, n_tokens:int, warmup:int = 1):
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    for batch in batches[:warmup]:
+        ner.extract_entities_many(batch, entity_types=entity_types, batch_size=batch_size)
+    latencies = []
+    start = time.perf_counter()
+    for batch in batches:
+        t = time.perf_counter()
+        ner.extract_entities_many(batch, entity_types=entity_types, batch_size=batch_size)
+        latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+    lat_ms = np.array(latencies) * 1e3
+    return {
+        'seconds': elapsed,
+        'sentences_per_s': len(texts) / elapsed,
+        'tokens_per_s': n_tokens / elapsed,
+        'batch_latency_ms': {
+            'p50': float(np.percentile(lat_ms, 50)),
+            'p95': float(np.percentile(lat_ms, 95)),
+            'p99': float(np.percentile(lat_ms, 99)),
+        },
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+def run_config(device:str, threads:int, types:str, batch_size:int, texts:list):
+    """
+    Runs in a child process: loads the models on device and benchmarks one
+    configuration.
+    """
+    import torch
+    from information_extraction.NER import BiomedicalNER
+    torch.set_num_threads(threads)
+    start = time.perf_counter()
+    ner = BiomedicalNER(load_grounders=False, device=device)
+    load = {'device': device, 'seconds': time.perf_counter() - start, 'models': sorted(ner.pipelines),
+            'peak_rss_mb': peak_rss_mb()}
+    entity_types = 'all' if types == 'all' else types.split(',')
+    result = bench_config(ner, texts, entity_types, batch_size, count_tokens(ner, texts))
+    result.update({'device': device, 'threads': threads, 'entity_types': types, 'batch_size': batch_size, 'load': load})
+    return result
+
+def environment():
+    import torch
+    import transformers
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'torch': torch.__version__,
+        'transformers': transformers.__version__,
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='BiomedicalNER throughput/latency benchmark')
+    parser.add_argument('--sentences', type=int, default=512, help='synthetic sentences per configuration')
+    parser.add_argument('--text-file', default=None, help='one sentence per line, instead of synthetic text')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--threads', type=int, nargs='+', default=sorted({1, os.cpu_count() or 1}))
+    parser.add_argument('--types', nargs='+', default=['all', 'gene', 'gene,disease,chemical'],
+                        help="entity-type subsets, 'all' or comma separated")
+    parser.add_argument('--devices', nargs='+', default=['cpu'], help="e.g. cpu cuda:0")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=None, help='JSON report path, stdout if not given')
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.text_file:
+        with open(args.text_file) as f:
+            texts = [line.strip() for line in f if line.strip()]
+    else:
+        texts = synthetic_sentences(args.sentences, seed=args.seed)
+
+    report = {'date': datetime.now().isoformat(timespec='seconds'), 'environment': environment(),
+              'n_sentences': len(texts), 'load': [], 'runs': []}
+    ctx = mp.get_context('spawn')
+    print(f"{'device':<8}{'threads':>8}{'types':>24}{'batch':>6}{'sent/s':>10}{'tok/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'RSS MB':>9}", file=sys.stderr)
+    for device in args.devices:
+        for threads in args.threads:
+            for types in args.types:
+                for batch_size in args.batch_sizes:
+                    with ctx.Pool(1) as pool:
+                        result = pool.apply(run_config, (device, threads, types, batch_size, texts))
+                    load = result.pop('load')
+                    if not any(l['device'] == device for l in report['load']):
+                        report['load'].append(load)
+                    report['runs'].append(result)
+                    lat = result['batch_latency_ms']
+                    print(f"{device:<8}{threads:>8}{types:>24}{batch_size:>6}{result['sentences_per_s']:>10.1f}{result['tokens_per_s']:>10.0f}"
+                          f"{lat['p50']:>9.1f}{lat['p95']:>9.1f}{lat['p99']:>9.1f}{result['peak_rss_mb']:>9.0f}", file=sys.stderr)
+
+    out = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(out)
+    else:
+        print(out)
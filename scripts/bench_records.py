@@ -0,0 +1,72 @@
+import sys
+import os
+import time
+import tracemalloc
+from enum import Enum
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from adapters.nodes import NodeRecord, fields_of
+from utils.str_utils import escape_text
+
+# micro-benchmark: per-instance Node classes as they were vs. NodeRecord
+N = 200000
+
+class Bench_Field(Enum):
+    RSID = "rsid"
+    REF = "ref"
+    ALT = "alt"
+    SOURCE = "source"
+
+class LegacyNode:
+    """
+    the pattern every adapter used before adapters.nodes.NodeRecord
+    """
+    def __init__(self, id:str=None, fields: list = None, properties: dict = None):
+        self.id = id
+        self.label = 'snv'
+        self.fields = self._generate_fields(fields)
+        self.properties = self._generate_properties(properties)
+
+    def _generate_fields(self, fields):
+        if fields is not None:
+            return [i.value for i in Bench_Field]
+        else:
+            return fields
+
+    def _generate_properties(self, properties):
+        prop_dict = {}
+        for field in self.fields:
+            f = properties.get(field)
+            if f:
+                if isinstance(f, str):
+                    prop_dict[field] = escape_text(f)
+                else:
+                    prop_dict[field] = properties.get(field)
+        return prop_dict
+
+class RecordNode(NodeRecord):
+    __slots__ = ()
+    LABEL = 'snv'
+    FIELDS = fields_of(Bench_Field)
+
+def run(cls, records, fields):
+    tracemalloc.start()
+    start = time.perf_counter()
+    nodes = [cls(id=d['rsid'], fields=fields, properties=d) for d in records]
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del nodes
+    return elapsed, peak
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else N
+    records = [{'rsid': f'rs{i}', 'ref': 'A', 'alt': 'G', 'id': f'rs{i}', 'source': 'dbSNP'} for i in range(n)]
+    fields = fields_of(Bench_Field)
+    print(f"{'class':<12}{'seconds':>10}{'records/s':>14}{'peak MB':>10}")
+    results = {}
+    for cls in [LegacyNode, RecordNode]:
+        elapsed, peak = run(cls, records, fields)
+        results[cls.__name__] = (elapsed, peak)
+        print(f"{cls.__name__:<12}{elapsed:>10.3f}{n / elapsed:>14,.0f}{peak / 1e6:>10.1f}")
+    (t0, m0), (t1, m1) = results['LegacyNode'], results['RecordNode']
+    print(f"speedup {t0 / t1:.2f}x, peak memory {m1 / m0:.0%} of legacy")
@@ -1,96 +1,44 @@
 import sys
-from biocypher import BioCypher
-from adapters.pubmed_adapter import PubmedAdapter
-from adapters.journal_adapter import JournalAdapter
-from adapters.vocab_adapter import OntologyAdapter, OMAdapter
-from adapters.dbsnp_adapter import dbSNPAdapter
-from adapters.reactome_adapter import ReactomeAdapter
-from adapters.go_adapter import GOAdapter
-from adapters.primekg_adapter import PrimeKGAdapter
-from adapters.gwas_adapter import GWASAdapter
-
 import os
+import argparse
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from biocypher._logger import logger
-from glob import glob
+from utils.build_orchestrator import load_config, build
+from utils.profiling import configure as configure_profiling
 logger.debug(f"Loading module {__name__}.")
 
-def split(a, n):
-    k, m = divmod(len(a), n)
-    return (a[i*k+min(i, m):(i+1)*k+min(i+1, m)] for i in range(n))
-
-SCHEMA_CONFIG = "/nfs/turbo/umms-drjieliu/proj/medlineKG/data/graph_schema/glkb_schema_config.yaml"
-BIOCYPHER_CONFIG = "/nfs/turbo/umms-drjieliu/proj/medlineKG/data/graph_schema/glkb_biocypher_config.yaml"
-
-bc = BioCypher(
-    biocypher_config_path=BIOCYPHER_CONFIG,
-    schema_config_path=SCHEMA_CONFIG
-)
-
-files = [
-    (PubmedAdapter, '/nfs/turbo/umms-drjieliu/proj/medlineKG/data/pubmed_xml/'),
-    (JournalAdapter, '/nfs/turbo/umms-drjieliu/proj/medlineKG/data/journal_list/J_Medline.txt'),
-    (OntologyAdapter, )
-    (dbSNPAdapter, '/nfs/turbo/umms-drjieliu/proj/genomeKG/data/dbSNP/processed/dbSNP_snp.txt'),
-    (ReactomeAdapter, {'data':'/nfs/turbo/umms-drjieliu/proj/medlineKG/data/reactome/ReactomePathways.txt', 'rt2gene':'/nfs/turbo/umms-drjieliu/proj/medlineKG/data/reactome/NCBI2Reactome.txt', 'rt2pub':'/nfs/turbo/umms-drjieliu/proj/medlineKG/data/reactome/ReactionPMIDS.txt', 'hier':'/nfs/turbo/umms-drjieliu/proj/medlineKG/data/reactome/ReactomePathwaysRelation.txt'}),
-    (GOAdapter, ),
-    (PrimeKGAdapter, '/nfs/turbo/umms-drjieliu/proj/medlineKG/data/primekg/kg.csv'),
-    (GWASAdapter, {'snp_gene':'/nfs/turbo/umms-drjieliu/proj/genomeKG/data/GWAS/processed/SNP_intra_gene.txt', 'snp_trait': '/nfs/turbo/umms-drjieliu/proj/genomeKG/data/GWAS/processed/SNP_trait.txt'}),
-    (OMAdapter, '/nfs/turbo/umms-drjieliu/usr/xinyubao/umls_matching/database/mappings_without_dup.csv'),
-]
-
-logger.debug(bc.show_ontology_structure())
-
-for info in files:
-    if len(info) == 2: # load file from disk
-        if isinstance(info[1], dict): # load multiple files at once
-            adpt, p = info
-            adapter = adpt().load_data(**p)
-            try:
-                bc.write_nodes(adapter.get_nodes(), batch_size=int(1e8))
-            except StopIteration: # no nodes generated
-                pass
-            try:
-                bc.write_edges(adapter.get_edges(), batch_size=int(1e8))
-            except StopIteration: # no nodes generated
-                pass
-        else:
-            if isinstance(info[1], list): # load list of files
-                adpt, fs = info
-            elif os.path.exists(info[1]):
-                adpt, p = info
-                if os.path.isdir(p):
-                    fs = os.listdir(p)
-                else:
-                    fs = [p]
-            
-            logger.debug(f"Running {adpt.__name__}.")
-
-            for f in fs:
-                logger.debug(f"Processing data in {f}")
-                adapter = adpt().load_data(os.path.join(p, f))
-                
-                try:
-                    bc.write_nodes(adapter.get_nodes())
-                except StopIteration: # no nodes generated
-                    pass
-                try:
-                    bc.write_edges(adapter.get_edges())
-                except StopIteration: # no nodes generated
-                    pass
-
-    else: # dont need to load from disk
-        adpt = info[0]
-        logger.debug(f"Running {adpt.__name__}.")
-
-        adapter = adpt().load_data()
-        try:
-            bc.write_nodes(adapter.get_nodes(), batch_size=int(1e8))
-        except StopIteration: # no nodes generated
-            pass
-        try:
-            bc.write_edges(adapter.get_edges(), batch_size=int(1e8))
-        except StopIteration: # no nodes generated
-            pass
-
-bc.summary()
-bc.write_import_call()
\ No newline at end of file
+# builds the graph from the jobs of a config (default scripts/build_kg.yaml),
+# independent jobs in parallel processes, into one neo4j-admin import call.
+
+CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'build_kg.yaml')
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='build the knowledge graph import files')
+    parser.add_argument('--config', default=CONFIG, help='YAML or TOML job config')
+    parser.add_argument('--jobs', nargs='+', default=None, help='only these jobs (and their dependencies)')
+    parser.add_argument('--max-workers', type=int, default=None, help='parallel jobs, overrides the config')
+    parser.add_argument('--memory-budget', type=float, default=None, help='MB for the write buffers of all running jobs, overrides the config')
+    parser.add_argument('--report', default=None, help='build report path (.json, a .csv is written next to it)')
+    parser.add_argument('--profile', default=None, help='see utils/profiling.py')
+    parser.add_argument('--profile-dir', default=None)
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    config = load_config(args.config)
+    if args.memory_budget:
+        config['memory_budget_mb'] = args.memory_budget
+
+    # opt-in: --profile "PubmedAdapter.get_nodes,Custom_Grounder.ground=sample" or GLKB_PROFILE;
+    # exported to the environment, so the job processes profile the same stages
+    configure_profiling()
+
+    # set BUILD_PROGRESS=<n> to log progress every n records
+    report, failed, skipped = build(config, jobs=args.jobs, max_workers=args.max_workers,
+                                    progress_every=int(os.environ.get('BUILD_PROGRESS', 0)))
+    report_path = args.report or os.environ.get('BUILD_REPORT') or config.get('report', 'build_report.json')
+    report.write(report_path)
+    report.write(os.path.splitext(report_path)[0] + '.csv')
+    if failed or skipped:
+        logger.error(f"Failed jobs: {failed}, skipped jobs: {skipped}")
+        sys.exit(1)
@@ -0,0 +1,13 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from adapters.dbsnp_adapter import build_rsid_index
+
+DBSNP_FILE = '/nfs/turbo/umms-drjieliu/proj/genomeKG/data/dbSNP/processed/dbSNP_snp.txt'
+INDEX_DIR = '/nfs/turbo/umms-drjieliu/proj/genomeKG/data/dbSNP/processed/rsid_index'
+
+if __name__ == "__main__":
+    # usage: python scripts/build_rsid_index.py [dbsnp_file] [index_dir]
+    dbsnp_file = sys.argv[1] if len(sys.argv) > 1 else DBSNP_FILE
+    index_dir = sys.argv[2] if len(sys.argv) > 2 else INDEX_DIR
+    build_rsid_index(dbsnp_file, index_dir, with_alleles=True)
@@ -1,12 +1,9 @@
-from seqeval.metrics import (
-    classification_report,
-    precision_score,
-    recall_score,
-    f1_score
-)
+from collections import Counter
+from itertools import islice
 from seqeval.metrics.sequence_labeling import get_entities
 from tqdm import tqdm
 import re
+import numpy as np
 import pandas as pd
 from datasets import load_dataset
 import sys
@@ -63,199 +60,173 @@ def convert_genia_label(label):
     else:
         return "O"
 
-def evaluate_biomedical_ner_on_genia(ner, dataset, evaluate_with_llm=False):
-    true_labels = []
-    pred_labels = []
-
-    for example in tqdm(dataset, desc="Evaluating"):
-        tokens = example["tokens"]
-        raw_labels = example["labels"]
-        text = " ".join(tokens)
-
-        # Convert GENIA fine-grained labels to model-compatible tags
-        gold_labels = [convert_genia_label(lbl) for lbl in raw_labels]
-        true_labels.append(gold_labels)
-
-        # Predict using your model
-        result = ner.extract_entities(text, entity_types=['gene', 'chemical', 'organism', 'anatomical', 'cell_type', 'cell_line'], confidence_threshold=0.3, ground_entities=False, evaluate_with_llm=evaluate_with_llm)
-        predicted_tags = ["O"] * len(tokens)
-
-        # Char → token mapping
-        char_to_token = {}
-        cur_char = 0
-        for idx, token in enumerate(tokens):
-            for c in range(len(token)):
-                char_to_token[cur_char + c] = idx
-            cur_char += len(token) + 1  # +1 for space
-
-        for entity_type, entities in result.items():
-            if entity_type not in model_entity_types:
-                continue
-            for ent in entities:
-                start_token = char_to_token.get(ent['start'])
-                end_token = char_to_token.get(ent['end'] - 1)
-                if start_token is None or end_token is None:
+def token_offsets(tokens):
+    """
+    Character start/end of every token in " ".join(tokens), as arrays
+    """
+    lengths = np.fromiter((len(t) for t in tokens), dtype=np.int64, count=len(tokens))
+    starts = np.zeros(len(tokens), dtype=np.int64)
+    if len(tokens) > 1:
+        starts[1:] = np.cumsum(lengths[:-1] + 1)  # +1 for space
+    return starts, starts + lengths
+
+def align_entities(tokens, entities, label_for=None):
+    """
+    BIO tags of tokens from character-level entities, mapping all entity
+    boundaries to tokens with one searchsorted call. Entities starting or
+    ending on a space are skipped.
+
+    Args:
+        entities: list of (entity_type, start, end).
+        label_for: optional entity type -> tag name, e.g. {'gene': 'GENE'}.
+    """
+    tags = ["O"] * len(tokens)
+    if not entities or not tokens:
+        return tags
+    starts, ends = token_offsets(tokens)
+    ent_starts = np.array([e[1] for e in entities], dtype=np.int64)
+    ent_lasts = np.array([e[2] - 1 for e in entities], dtype=np.int64)
+    first_tok = np.searchsorted(starts, ent_starts, side='right') - 1
+    last_tok = np.searchsorted(starts, ent_lasts, side='right') - 1
+    valid = (first_tok >= 0) & (last_tok >= 0)
+    first_c, last_c = np.clip(first_tok, 0, None), np.clip(last_tok, 0, None)
+    valid &= (ent_starts < ends[first_c]) & (ent_lasts < ends[last_c])
+    for k in np.flatnonzero(valid).tolist():
+        entity_type = entities[k][0]
+        label = label_for.get(entity_type, entity_type) if label_for else entity_type
+        i, j = int(first_tok[k]), int(last_tok[k])
+        for t in range(i, j + 1):
+            tags[t] = f"{'B' if t == i else 'I'}-{label}"
+    return tags
+
+
+class EntityMetrics:
+    """
+    Streaming entity-level precision/recall/F1, the numbers seqeval computes,
+    from per-type true positive, false positive and false negative counts, so
+    no tag sequence has to be kept.
+    """
+    def __init__(self):
+        self.tp = Counter()
+        self.fp = Counter()
+        self.fn = Counter()
+
+    def update(self, gold_tags, pred_tags):
+        gold = set(get_entities(gold_tags))
+        pred = set(get_entities(pred_tags))
+        for entity_type, _, _ in gold & pred:
+            self.tp[entity_type] += 1
+        for entity_type, _, _ in pred - gold:
+            self.fp[entity_type] += 1
+        for entity_type, _, _ in gold - pred:
+            self.fn[entity_type] += 1
+
+    @staticmethod
+    def _prf(tp, fp, fn):
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        return precision, recall, f1
+
+    def global_scores(self):
+        precision, recall, f1 = self._prf(sum(self.tp.values()), sum(self.fp.values()), sum(self.fn.values()))
+        return {'precision': precision, 'recall': recall, 'f1': f1}
+
+    def per_label(self):
+        rows = {}
+        for entity_type in sorted(set(self.tp) | set(self.fp) | set(self.fn)):
+            precision, recall, f1 = self._prf(self.tp[entity_type], self.fp[entity_type], self.fn[entity_type])
+            rows[entity_type] = {'precision': precision, 'recall': recall, 'f1-score': f1,
+                                 'support': self.tp[entity_type] + self.fn[entity_type]}
+        return pd.DataFrame.from_dict(rows, orient='index', columns=['precision', 'recall', 'f1-score', 'support'])
+
+
+def batched(iterable, n):
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, n))
+        if not batch:
+            return
+        yield batch
+
+def evaluate_ner(ner, dataset, gold_tags_fn, entity_types, confidence_threshold=0.3, label_for=None,
+                 evaluate_with_llm=False, batch_size=64, desc="Evaluating"):
+    """
+    Shared evaluation loop: examples go through the NER models in batches,
+    predictions are aligned to tokens from their offsets and folded into
+    EntityMetrics one batch at a time.
+
+    Args:
+        dataset: iterable of examples with a 'tokens' list.
+        gold_tags_fn: example -> gold BIO tags.
+        entity_types: model entity types to predict.
+        label_for: optional model entity type -> dataset tag name.
+        evaluate_with_llm: drop predictions below 0.9 the LLM rejects.
+    """
+    metrics = EntityMetrics()
+    total = (len(dataset) + batch_size - 1) // batch_size if hasattr(dataset, '__len__') else None
+    for batch in tqdm(batched(dataset, batch_size), total=total, desc=desc):
+        texts = [" ".join(example['tokens']) for example in batch]
+        results = ner.extract_entities_many(texts, entity_types=entity_types, confidence_threshold=confidence_threshold, batch_size=batch_size)
+        for example, text, result in zip(batch, texts, results):
+            tokens = example['tokens']
+            gold_tags = gold_tags_fn(example)
+            entities = []
+            for entity_type, ents in result.items():
+                if entity_type not in model_entity_types:
                     continue
-                for i in range(start_token, end_token + 1):
-                    tag = f"{'B' if i == start_token else 'I'}-{entity_type}"
-                    if i < len(predicted_tags):
-                        predicted_tags[i] = tag
-
-        pred_labels.append(predicted_tags)
-
-    # Compute metrics
-    global_precision = precision_score(true_labels, pred_labels)
-    global_recall = recall_score(true_labels, pred_labels)
-    global_f1 = f1_score(true_labels, pred_labels)
+                for ent in ents:
+                    if evaluate_with_llm and ent['score'] < 0.9 and not ner.evaluate_ner_with_llm(text, ent['entity'], entity_type):
+                        continue
+                    entities.append((entity_type, ent['start'], ent['end']))
+            pred_tags = align_entities(tokens, entities, label_for)
+            if len(pred_tags) != len(gold_tags):
+                print(f"[Warning] Length mismatch for id {example.get('id', 'unknown')} — skipping")
+                continue
+            metrics.update(gold_tags, pred_tags)
+    return report(metrics)
 
+def report(metrics):
+    scores = metrics.global_scores()
     print("\n🔹 Global (micro-averaged) scores:")
-    print(f"Precision: {global_precision:.4f}")
-    print(f"Recall:    {global_recall:.4f}")
-    print(f"F1-score:  {global_f1:.4f}")
+    print(f"Precision: {scores['precision']:.4f}")
+    print(f"Recall:    {scores['recall']:.4f}")
+    print(f"F1-score:  {scores['f1']:.4f}")
 
     print("\n🔹 Per-entity-type classification report:")
-    label_report = classification_report(true_labels, pred_labels, output_dict=True, digits=4)
-    df = pd.DataFrame(label_report).transpose()
-    display_cols = ['precision', 'recall', 'f1-score', 'support']
-    df = df.loc[[k for k in df.index if k not in ['micro avg', 'macro avg', 'weighted avg', 'accuracy']], display_cols]
+    df = metrics.per_label()
     print(df.to_string())
-    
     return {
-        'global': {
-            'precision': global_precision,
-            'recall': global_recall,
-            'f1': global_f1
-        },
+        'global': scores,
         'per_label': df
     }
 
-def evaluate_biomedical_ner_on_ncbi_disease(ner, dataset, evaluate_with_llm=False):
-    # Map tag indices to names (e.g., 0->'O', 1->'B-Disease', etc.)
-    label_list = dataset.features['ner_tags'].feature.names
-    
-    true_labels = []
-    pred_labels = []
-
-    for example in tqdm(dataset, desc="Evaluating NCBI Disease"):
-        tokens = example['tokens']
-        gold_ids = example['ner_tags']
-        gold_tags = [label_list[i] for i in gold_ids]
-        true_labels.append(gold_tags)
-
-        text = " ".join(tokens)
-
-        # Predict using the 'disease' model
-        result = ner.extract_entities(
-            text, entity_types=['disease'], confidence_threshold=0.3, ground_entities=False, evaluate_with_llm=evaluate_with_llm
-        )
-        predicted_tags = ["O"] * len(tokens)
-
-        # Map character positions to token indices
-        char_to_token = {}
-        cur_char = 0
-        for idx, tok in enumerate(tokens):
-            for c in range(len(tok)):
-                char_to_token[cur_char + c] = idx
-            cur_char += len(tok) + 1
+def evaluate_biomedical_ner_on_genia(ner, dataset, evaluate_with_llm=False, batch_size=64):
+    return evaluate_ner(
+        ner, dataset,
+        gold_tags_fn=lambda example: [convert_genia_label(lbl) for lbl in example["labels"]],
+        entity_types=['gene', 'chemical', 'organism', 'anatomical', 'cell_type', 'cell_line'],
+        confidence_threshold=0.3, evaluate_with_llm=evaluate_with_llm, batch_size=batch_size, desc="Evaluating"
+    )
 
-        for ent in result.get('disease', []):
-            start_token = char_to_token.get(ent['start'])
-            end_token = char_to_token.get(ent['end'] - 1)
-            if start_token is None or end_token is None:
-                continue
-            for i in range(start_token, end_token + 1):
-                tag = "B-Disease" if i == start_token else "I-Disease"
-                if i < len(predicted_tags):
-                    predicted_tags[i] = tag
-
-        pred_labels.append(predicted_tags)
-
-    # Compute metrics
-    global_precision = precision_score(true_labels, pred_labels)
-    global_recall = recall_score(true_labels, pred_labels)
-    global_f1 = f1_score(true_labels, pred_labels)
-
-    print("\n🔹 Global (micro-averaged) scores:")
-    print(f"Precision: {global_precision:.4f}")
-    print(f"Recall:    {global_recall:.4f}")
-    print(f"F1-score:  {global_f1:.4f}")
-
-    print("\n🔹 Per-label classification report:")
-    print(classification_report(true_labels, pred_labels, digits=4))
-
-    return {
-        'global': {
-            'precision': global_precision,
-            'recall': global_recall,
-            'f1': global_f1
-        }
-    }
-
-def evaluate_biomedical_ner_on_bc2gm(ner, dataset, evaluate_with_llm=False):
+def evaluate_biomedical_ner_on_ncbi_disease(ner, dataset, evaluate_with_llm=False, batch_size=64):
     # Map tag indices to names (e.g., 0->'O', 1->'B-Disease', etc.)
     label_list = dataset.features['ner_tags'].feature.names
-    
-    true_labels = []
-    pred_labels = []
-
-    for example in tqdm(dataset, desc="Evaluating BC2GM"):
-        tokens = example['tokens']
-        gold_ids = example['ner_tags']
-        gold_tags = [label_list[i] for i in gold_ids]
-        true_labels.append(gold_tags)
-
-        text = " ".join(tokens)
-        # print(text)
-
-        # Predict using the 'gene' model
-        result = ner.extract_entities(
-            text, entity_types=['gene'], confidence_threshold=0.3, ground_entities=False, evaluate_with_llm=evaluate_with_llm
-        )
-        predicted_tags = ["O"] * len(tokens)
-        # print(result)
-
-        # Map character positions to token indices
-        char_to_token = {}
-        cur_char = 0
-        for idx, tok in enumerate(tokens):
-            for c in range(len(tok)):
-                char_to_token[cur_char + c] = idx
-            cur_char += len(tok) + 1
-
-        for ent in result.get('gene', []):
-            start_token = char_to_token.get(ent['start'])
-            end_token = char_to_token.get(ent['end'] - 1)
-            if start_token is None or end_token is None:
-                continue
-            for i in range(start_token, end_token + 1):
-                tag = "B-GENE" if i == start_token else "I-GENE"
-                if i < len(predicted_tags):
-                    predicted_tags[i] = tag
-
-        pred_labels.append(predicted_tags)
-        # print(gold_tags)
-        # print(predicted_tags)
-
-    # Compute metrics
-    global_precision = precision_score(true_labels, pred_labels)
-    global_recall = recall_score(true_labels, pred_labels)
-    global_f1 = f1_score(true_labels, pred_labels)
-
-    print("\n🔹 Global (micro-averaged) scores:")
-    print(f"Precision: {global_precision:.4f}")
-    print(f"Recall:    {global_recall:.4f}")
-    print(f"F1-score:  {global_f1:.4f}")
-
-    print("\n🔹 Per-label classification report:")
-    print(classification_report(true_labels, pred_labels, digits=4))
-
-    return {
-        'global': {
-            'precision': global_precision,
-            'recall': global_recall,
-            'f1': global_f1
-        }
-    }
+    return evaluate_ner(
+        ner, dataset,
+        gold_tags_fn=lambda example: [label_list[i] for i in example['ner_tags']],
+        entity_types=['disease'], label_for={'disease': 'Disease'},
+        confidence_threshold=0.3, evaluate_with_llm=evaluate_with_llm, batch_size=batch_size, desc="Evaluating NCBI Disease"
+    )
+
+def evaluate_biomedical_ner_on_bc2gm(ner, dataset, evaluate_with_llm=False, batch_size=64):
+    label_list = dataset.features['ner_tags'].feature.names
+    return evaluate_ner(
+        ner, dataset,
+        gold_tags_fn=lambda example: [label_list[i] for i in example['ner_tags']],
+        entity_types=['gene'], label_for={'gene': 'GENE'},
+        confidence_threshold=0.3, evaluate_with_llm=evaluate_with_llm, batch_size=batch_size, desc="Evaluating BC2GM"
+    )
 
 bionlp_to_model_map = {
     'PROTEIN': 'gene',
@@ -275,82 +246,20 @@ def convert_bionlp_label(label):
         return f"{prefix}-{coarse}"
     return "O"
 
-def evaluate_biomedical_ner_on_bionlp11id(ner, dataset, evaluate_with_llm=False):
-    true_labels = []
-    pred_labels = []
-
-    for example in tqdm(dataset, desc="Evaluating BioNLP11ID-ggp"):
-        tokens = example['tokens']
-        raw_tags = example['ner_tags']
-        gold_tags = [convert_bionlp_label(tag) for tag in raw_tags]
-
-        text = " ".join(tokens)
-        predicted_tags = ["O"] * len(tokens)
-
-        # Char → token index map
-        char_to_token = {}
-        cur_char = 0
-        for idx, tok in enumerate(tokens):
-            for c in range(len(tok)):
-                char_to_token[cur_char + c] = idx
-            cur_char += len(tok) + 1
-
-        result = ner.extract_entities(text, entity_types=['gene', 'chemical', 'organism'], confidence_threshold=0.0, ground_entities=False, evaluate_with_llm=evaluate_with_llm)
-
-        for entity_type, entities in result.items():
-            if entity_type not in model_entity_types:
-                continue
-            for ent in entities:
-                start_token = char_to_token.get(ent['start'])
-                end_token = char_to_token.get(ent['end'] - 1)
-                if start_token is None or end_token is None:
-                    continue
-                for i in range(start_token, end_token + 1):
-                    tag = f"{'B' if i == start_token else 'I'}-{entity_type}"
-                    if i < len(predicted_tags):
-                        predicted_tags[i] = tag
-
-        if len(predicted_tags) != len(gold_tags):
-            print(f"[Warning] Length mismatch for id {example.get('id', 'unknown')} — skipping")
-            continue
-
-        true_labels.append(gold_tags)
-        pred_labels.append(predicted_tags)
-
-    # Metrics
-    global_precision = precision_score(true_labels, pred_labels)
-    global_recall = recall_score(true_labels, pred_labels)
-    global_f1 = f1_score(true_labels, pred_labels)
-
-    print("\n🔹 Global (micro-averaged) scores:")
-    print(f"Precision: {global_precision:.4f}")
-    print(f"Recall:    {global_recall:.4f}")
-    print(f"F1-score:  {global_f1:.4f}")
-
-    print("\n🔹 Per-label classification report:")
-    report = classification_report(true_labels, pred_labels, output_dict=True, digits=4)
-    df = pd.DataFrame(report).transpose()
-    df = df.loc[[k for k in df.index if k not in ['micro avg', 'macro avg', 'weighted avg', 'accuracy']], ['precision', 'recall', 'f1-score', 'support']]
-    print(df.to_string())
-
-    return {
-        'global': {
-            'precision': global_precision,
-            'recall': global_recall,
-            'f1': global_f1
-        },
-        'per_label': df
-    }
+def evaluate_biomedical_ner_on_bionlp11id(ner, dataset, evaluate_with_llm=False, batch_size=64):
+    return evaluate_ner(
+        ner, dataset,
+        gold_tags_fn=lambda example: [convert_bionlp_label(tag) for tag in example['ner_tags']],
+        entity_types=['gene', 'chemical', 'organism'],
+        confidence_threshold=0.0, evaluate_with_llm=evaluate_with_llm, batch_size=batch_size, desc="Evaluating BioNLP11ID-ggp"
+    )
 
 if __name__ == "__main__":
     ner = BiomedicalNER()
     # genia_test = load_dataset("enoriega/GENIA-Term-Corpus", split="test")
-    # genia_test = genia_test.select(range(1000))
     # disease_test = load_dataset("ncbi/ncbi_disease", split="test")
     # gene_test = load_dataset("omniquad/BioNLP11ID-ggp-IOB", split="test")
-    # gene_test = gene_test.select(range(1000))
     gene_test = load_dataset("omniquad/BioNLP11ID-ggp-IOB", split="test")
-    gene_test = gene_test.select(range(1000))
 
     # metrics = evaluate_biomedical_ner_on_genia(ner, genia_test, evaluate_with_llm=True)
     # metrics = evaluate_biomedical_ner_on_ncbi_disease(ner, disease_test, evaluate_with_llm=True)
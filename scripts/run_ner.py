@@ -0,0 +1,30 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from biocypher._logger import logger
+from utils.profiling import configure as configure_profiling
+from information_extraction.ner_pipeline import get_ner_stage, pubmed_documents, write_jsonl, write_parquet
+
+PUBMED_DIR = '/nfs/turbo/umms-drjieliu/proj/medlineKG/data/pubmed_xml/'
+NER_DIR = '/nfs/turbo/umms-drjieliu/proj/medlineKG/data/pubmed_ner/'
+
+if __name__ == "__main__":
+    # usage: python scripts/run_ner.py [pubmed xml dir] [output dir] [jsonl.gz|parquet]
+    # writes one <baseline file>.jsonl.gz (or .parquet) of NER records per MEDLINE xml, for NERAdapter;
+    # files already written are skipped, so an interrupted run can be restarted
+    # profiling: GLKB_PROFILE, also applied in the NER and grounding workers
+    configure_profiling()
+    pubmed_dir = sys.argv[1] if len(sys.argv) > 1 else PUBMED_DIR
+    ner_dir = sys.argv[2] if len(sys.argv) > 2 else NER_DIR
+    fmt = sys.argv[3] if len(sys.argv) > 3 else 'jsonl.gz'
+    write = write_parquet if fmt == 'parquet' else write_jsonl
+    os.makedirs(ner_dir, exist_ok=True)
+    stage = get_ner_stage()
+    for f in sorted(os.listdir(pubmed_dir)):
+        if not f.endswith(('.xml', '.xml.gz')):
+            continue
+        out = os.path.join(ner_dir, f.split('.xml')[0] + '.' + fmt)
+        if os.path.exists(out):
+            continue
+        n = write(stage.run(pubmed_documents(os.path.join(pubmed_dir, f))), out)
+        logger.info(f"Wrote {n} NER records to {out}")
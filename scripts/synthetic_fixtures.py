@@ -0,0 +1,258 @@
+import os
+import json
+import random
+from xml.sax.saxutils import escape
+from bench_ner import synthetic_sentences, GENES, DISEASES, CHEMICALS
+
+# synthetic inputs shaped like the primary sources the adapters read, so
+# ingestion can be benchmarked without the /nfs datasets. Every generator takes
+# a size and a seed, writes its file(s) under out_dir and returns what the
+# adapter's load_data expects (a path, or a dict of keyword arguments).
+# TABLES are the mapping tables and grounder terms the adapters load from /nfs,
+# with ids matching the fixtures; bench_adapters loads them in their place.
+
+ENTREZ_IDS = 100000
+DRUGBANK_IDS = 15000
+
+def medline_xml(out_dir:str, n:int, seed:int = 0):
+    """
+    MEDLINE baseline xml with n articles (title, 3-8 sentence abstract,
+    authors, journal, MeSH terms, publication types, references).
+    """
+    rng = random.Random(seed)
+    sents = synthetic_sentences(n * 9, seed=seed)
+    path = os.path.join(out_dir, 'pubmed_synthetic.xml')
+    with open(path, 'w') as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n<PubmedArticleSet>\n')
+        for i in range(n):
+            pmid = 10000000 + i
+            title = escape(sents[i * 9])
+            abstract = escape(' '.join(sents[i * 9 + 1:i * 9 + 1 + rng.randint(3, 8)]))
+            authors = ''.join(
+                f'<Author><LastName>Author{a}</LastName><ForeName>Test</ForeName>'
+                f'<AffiliationInfo><Affiliation>University {a % 7}</Affiliation></AffiliationInfo></Author>'
+                for a in rng.sample(range(1000), rng.randint(1, 6)))
+            mesh = ''.join(
+                f'<MeshHeading><DescriptorName UI="D{d:06d}">Term {d}</DescriptorName></MeshHeading>'
+                for d in rng.sample(range(1, 60000), rng.randint(2, 10)))
+            refs = ''.join(
+                f'<Reference><Citation>Ref {r}</Citation><ArticleIdList><ArticleId IdType="pubmed">{r}</ArticleId></ArticleIdList></Reference>'
+                for r in rng.sample(range(1, 10000000), rng.randint(0, 20)))
+            f.write(
+                f'<PubmedArticle><MedlineCitation Status="MEDLINE" Owner="NLM"><PMID Version="1">{pmid}</PMID>'
+                f'<Article PubModel="Print"><Journal><JournalIssue CitedMedium="Print"><PubDate><Year>{rng.randint(1980, 2024)}</Year></PubDate></JournalIssue>'
+                f'<Title>Journal {i % 500}</Title><ISOAbbreviation>J {i % 500}</ISOAbbreviation></Journal>'
+                f'<ArticleTitle>{title}</ArticleTitle><Abstract><AbstractText>{abstract}</AbstractText></Abstract>'
+                f'<AuthorList CompleteYN="Y">{authors}</AuthorList><Language>eng</Language>'
+                f'<PublicationTypeList><PublicationType UI="D016428">Journal Article</PublicationType></PublicationTypeList></Article>'
+                f'<MedlineJournalInfo><MedlineTA>J {i % 500}</MedlineTA><NlmUniqueID>{7700000 + i % 500}</NlmUniqueID></MedlineJournalInfo>'
+                f'<MeshHeadingList>{mesh}</MeshHeadingList></MedlineCitation>'
+                f'<PubmedData><ArticleIdList><ArticleId IdType="pubmed">{pmid}</ArticleId><ArticleId IdType="doi">10.1000/syn.{pmid}</ArticleId></ArticleIdList>'
+                f'<ReferenceList>{refs}</ReferenceList></PubmedData></PubmedArticle>\n')
+        f.write('</PubmedArticleSet>\n')
+    return path
+
+def journal_list(out_dir:str, n:int, seed:int = 0):
+    """
+    J_Medline.txt with n journal records.
+    """
+    rng = random.Random(seed)
+    path = os.path.join(out_dir, 'J_Medline.txt')
+    sep = '-' * 56 + '\n'
+    with open(path, 'w') as f:
+        f.write(sep)
+        for i in range(n):
+            issn = f'{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}'
+            f.write(f'JrId: {i + 1}\nJournalTitle: Journal of Synthetic {rng.choice(DISEASES).title()} {i}\n'
+                    f'MedAbbr: J Synth {i}\nISSN (Print): {issn}\nISSN (Online): \nIsoAbbr: J. Synth. {i}\n'
+                    f'NlmId: {7700000 + i}\n')
+            f.write(sep)
+    return path
+
+def dbsnp_tsv(out_dir:str, n:int, seed:int = 0, common_frac:float = 0.3):
+    """
+    processed dbSNP tsv (chr, start, end, rsid, ref, alt, common) with n snps.
+    """
+    rng = random.Random(seed)
+    path = os.path.join(out_dir, 'dbSNP_snp.txt')
+    with open(path, 'w') as f:
+        for i in range(n):
+            pos = rng.randint(1, 2_000_000_00)
+            ref, alt = rng.sample('ACGT', 2)
+            f.write(f'chr{rng.randint(1, 22)}\t{pos}\t{pos + 1}\trs{i + 1}\t{ref}\t{alt}\t{rng.random() < common_frac}\n')
+    return path
+
+def reactome(out_dir:str, n:int, seed:int = 0):
+    """
+    ReactomePathways, NCBI2Reactome, ReactomePathwaysRelation and
+    ReactionPMIDS tables around n pathways.
+    """
+    rng = random.Random(seed)
+    ids = [f'R-HSA-{100000 + i}' for i in range(n)]
+    paths = {k: os.path.join(out_dir, f) for k, f in [
+        ('data', 'ReactomePathways.txt'), ('rt2gene', 'NCBI2Reactome.txt'),
+        ('hier', 'ReactomePathwaysRelation.txt'), ('rt2pub', 'ReactionPMIDS.txt')]}
+    with open(paths['data'], 'w') as f:
+        for i, id in enumerate(ids):
+            species = 'Homo sapiens' if rng.random() < 0.8 else 'Mus musculus'
+            f.write(f'{id}\tSynthetic pathway {i} of {rng.choice(GENES)}\t{species}\n')
+    with open(paths['rt2gene'], 'w') as f:
+        for id in ids:
+            for gene in rng.sample(range(1, ENTREZ_IDS), rng.randint(1, 20)):
+                f.write(f'{gene}\t{id}\thttps://reactome.org/PathwayBrowser/#/{id}\tpathway\tTAS\tHomo sapiens\n')
+    with open(paths['hier'], 'w') as f:
+        for i in range(1, n):
+            f.write(f'{ids[rng.randrange(i)]}\t{ids[i]}\n')
+    with open(paths['rt2pub'], 'w') as f:
+        for id in ids:
+            for pmid in rng.sample(range(1, 40000000), rng.randint(0, 5)):
+                f.write(f'{id}\t{pmid}\n')
+    return paths
+
+PRIMEKG_SOURCES = {
+    # type: [(source, id, name or None for '{type} {id}')], one picked per row
+    'gene/protein': [('NCBI', lambda rng: str(rng.randint(1, ENTREZ_IDS)), None)],
+    'drug': [('DrugBank', lambda rng: f'DB{rng.randint(1, DRUGBANK_IDS):05d}', None)],
+    'disease': [('MONDO', lambda rng: str(rng.randint(1, 50000)), None),
+                ('MONDO_grouped', lambda rng: f'{rng.randint(1, 50000)}_{rng.randint(1, 50000)}', lambda rng: rng.choice(DISEASES))],
+    'exposure': [('CTD', lambda rng: f'D{rng.randint(1, 999999):06d}', lambda rng: rng.choice(CHEMICALS))],
+    'effect/phenotype': [('HPO', lambda rng: str(rng.randint(1, 40000)), None)],
+    'biological_process': [('GO', lambda rng: str(rng.randint(1, 70000)), None)],
+    'anatomy': [('UBERON', lambda rng: str(rng.randint(1, 20000)), None)],
+    'pathway': [('REACTOME', lambda rng: f'R-HSA-{rng.randint(100000, 999999)}', None)],
+}
+PRIMEKG_RELATIONS = [
+    ('protein_protein', 'ppi', 'gene/protein', 'gene/protein'),
+    ('drug_protein', 'target', 'drug', 'gene/protein'),
+    ('indication', 'indication', 'drug', 'disease'),
+    ('disease_protein', 'associated with', 'disease', 'gene/protein'),
+    ('disease_phenotype_positive', 'phenotype present', 'disease', 'effect/phenotype'),
+    ('bioprocess_protein', 'interacts with', 'biological_process', 'gene/protein'),
+    ('pathway_protein', 'interacts with', 'pathway', 'gene/protein'),
+    ('anatomy_protein_present', 'expression present', 'anatomy', 'gene/protein'),
+    ('exposure_disease', 'linked to', 'exposure', 'disease'),
+    ('disease_disease', 'parent-child', 'disease', 'disease'),
+]
+
+def primekg_csv(out_dir:str, n:int, seed:int = 0):
+    """
+    PrimeKG kg.csv with n edges over the sources ground_primekg_column handles
+    by rule, mapping table (see mapping_tables) or grounder (see grounder_terms).
+    """
+    rng = random.Random(seed)
+    path = os.path.join(out_dir, 'kg.csv')
+    with open(path, 'w') as f:
+        f.write('relation,display_relation,x_index,x_id,x_type,x_name,x_source,y_index,y_id,y_type,y_name,y_source\n')
+        for i in range(n):
+            relation, display, x_type, y_type = rng.choice(PRIMEKG_RELATIONS)
+            row = [relation, display]
+            for t in (x_type, y_type):
+                source, make_id, make_name = rng.choice(PRIMEKG_SOURCES[t])
+                id = make_id(rng)
+                name = make_name(rng) if make_name else f'{t} {id}'
+                row += [str(rng.randint(0, 130000)), id, t, f'"{name}"', source]
+            f.write(','.join(row) + '\n')
+    return path
+
+def gwas(out_dir:str, n:int, seed:int = 0):
+    """
+    GWAS SNP_intra_gene and SNP_trait tables with n rows each.
+    """
+    rng = random.Random(seed)
+    paths = {'snp_gene': os.path.join(out_dir, 'SNP_intra_gene.txt'),
+             'snp_trait': os.path.join(out_dir, 'SNP_trait.txt')}
+    with open(paths['snp_gene'], 'w') as f:
+        f.write('SNP\trisk allele\tgene\n')
+        for i in range(n):
+            f.write(f'rs{rng.randint(1, 10**8)}\t{rng.choice("ACGT")}\t{rng.choice(GENES)}\n')
+    with open(paths['snp_trait'], 'w') as f:
+        f.write('\t'.join(['trait', 'trait_uri', 'SNP', 'chr', 'start', 'end', 'risk allele', 'type', 'Intergenic',
+                           'CNV', 'Risk_freq', 'from_article', 'Accession', 'P_mlog', 'OR_Beta']) + '\n')
+        for i in range(n):
+            pos = rng.randint(1, 2 * 10**8)
+            f.write('\t'.join(map(str, [
+                rng.choice(DISEASES), f'http://www.ebi.ac.uk/efo/EFO_{rng.randint(1, 10**6):07d}', f'rs{rng.randint(1, 10**8)}',
+                rng.randint(1, 22), pos, pos + 1, rng.choice('ACGT'), 'intron_variant', 0, 'N',
+                round(rng.random(), 3), rng.randint(1, 40000000), f'GCST{rng.randint(1, 10**6):06d}',
+                round(rng.uniform(5, 50), 2), round(rng.uniform(0.5, 3), 2)])) + '\n')
+    return paths
+
+OM_PREFIXES = ['MONDO', 'HP', 'DOID', 'EFO', 'CHEBI', 'UBERON', 'hugo.owl#hgnc', 'NCIT', 'UNKNOWN']
+
+def om_csv(out_dir:str, n:int, seed:int = 0):
+    """
+    ontology mapping csv (head, tail, type, score, source) with n rows,
+    including prefixes get_om_curies drops.
+    """
+    rng = random.Random(seed)
+    path = os.path.join(out_dir, 'mappings.csv')
+    with open(path, 'w') as f:
+        f.write('head,tail,type,score,source\n')
+        for i in range(n):
+            head = f'{rng.choice(OM_PREFIXES)}_{rng.randint(1, 10**6):07d}'
+            tail = f'{rng.choice(OM_PREFIXES)}_{rng.randint(1, 10**6):07d}'
+            f.write(f'{head},{tail},equivalent,{round(rng.random(), 3)},{rng.choice(["logmap", "bertmap"])}\n')
+    return path
+
+def mapping_tables(out_dir:str, seed:int = 0, coverage:float = 0.8):
+    """
+    BioMart export and DrugBank to ChEBI mappings in the format of
+    utils.mapper.BIOMART_FILE and DRUGBANK_FILE, mapping a coverage share of
+    the Entrez and DrugBank ids the fixtures use.
+    """
+    rng = random.Random(seed)
+    paths = {'biomart': os.path.join(out_dir, 'biomart.txt'), 'drugbank': os.path.join(out_dir, 'drug-mappings.tsv')}
+    with open(paths['biomart'], 'w') as f:
+        f.write('Gene stable ID\tHGNC ID\tNCBI gene (formerly Entrezgene) ID\tGene name\tGene Synonym\n')
+        for i in range(1, ENTREZ_IDS + 1):
+            if rng.random() < coverage:
+                f.write(f'ENSG{i:011d}\tHGNC:{i}\t{i}\tGENE{i}\tSYN{i}\n')
+    with open(paths['drugbank'], 'w') as f:
+        f.write('drugbankId \t chebi_id \n') # padded as in the source, see compile_drugbank
+        for i in range(1, DRUGBANK_IDS + 1):
+            f.write(f'DB{i:05d} \t {rng.randint(1, 200000) if rng.random() < coverage else "null"} \n')
+    return paths
+
+GROUNDER_TERMS = {'gene': ('HGNC', GENES), 'disease': ('MONDO', DISEASES), 'chemical': ('CHEBI', CHEMICALS)}
+
+def grounder_terms(out_dir:str, kind:str):
+    """
+    gilda terms file like the custom grounders' {kind}.json, with a name term
+    for each synthetic name of that kind.
+    """
+    from gilda.process import normalize
+    db, names = GROUNDER_TERMS[kind]
+    path = os.path.join(out_dir, f'{kind}.json')
+    terms = [{'norm_text': normalize(name), 'text': name, 'db': db, 'id': str(i + 1), 'entry_name': name,
+              'status': 'name', 'source': db.lower()} for i, name in enumerate(names)]
+    with open(path, 'w') as f:
+        json.dump(terms, f)
+    return path
+
+def tables(out_dir:str, kinds:list, seed:int = 0):
+    """
+    {kind: path} of the mapping tables (biomart, drugbank) and grounder terms
+    (gene, disease, chemical) in kinds.
+    """
+    paths = {}
+    if {'biomart', 'drugbank'} & set(kinds):
+        paths.update({k: v for k, v in mapping_tables(out_dir, seed).items() if k in kinds})
+    for kind in GROUNDER_TERMS:
+        if kind in kinds:
+            paths[kind] = grounder_terms(out_dir, kind)
+    return paths
+
+FIXTURES = {
+    'pubmed': medline_xml,
+    'journal': journal_list,
+    'dbsnp': dbsnp_tsv,
+    'reactome': reactome,
+    'primekg': primekg_csv,
+    'gwas': gwas,
+    'om': om_csv,
+}
+TABLES = {
+    'reactome': ['biomart'],
+    'primekg': ['biomart', 'drugbank', 'disease', 'chemical'],
+    'gwas': ['gene'],
+}
@@ -0,0 +1,32 @@
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('transformers')
+pytest.importorskip('gilda')
+from information_extraction.NER import BiomedicalNER
+
+
+def token(word, start, end, score=0.9):
+    return {'word': word, 'start': start, 'end': end, 'score': score}
+
+def failing_pipeline(texts, batch_size=32):
+    raise RuntimeError('CUDA out of memory')
+
+def gene_pipeline(texts, batch_size=32):
+    return [[token('BRCA1', 0, 5)] for _ in texts]
+
+
+def ner_with(pipelines):
+    ner = BiomedicalNER.__new__(BiomedicalNER) # no models or grounders loaded
+    ner.pipelines = pipelines
+    return ner
+
+def test_extract_entities_many():
+    ner = ner_with({'gene': gene_pipeline})
+    results = ner.extract_entities_many(['BRCA1 is a gene.', 'BRCA1 again.'])
+    assert [[e['entity'] for e in r['gene']] for r in results] == [['BRCA1'], ['BRCA1']]
+
+def test_extract_entities_many_raises_if_one_type_fails():
+    ner = ner_with({'gene': gene_pipeline, 'disease': failing_pipeline})
+    with pytest.raises(RuntimeError, match='out of memory'):
+        ner.extract_entities_many(['BRCA1 is a gene.'])
@@ -0,0 +1,240 @@
+import os
+import re
+import time
+import importlib
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from biocypher._logger import logger
+from utils.build_report import BuildReport, peak_rss_mb
+from utils.memory_budget import budgeted, declared_labels, DEFAULT_BUDGET_MB
+
+# Config driven graph build. A config (YAML, or TOML for .toml files) declares
+# the BioCypher configs, an output directory and the jobs:
+#
+#   biocypher_config: /nfs/.../glkb_biocypher_config.yaml
+#   schema_config: /nfs/.../glkb_schema_config.yaml
+#   output_dir: biocypher-out/glkb
+#   max_workers: 4
+#   memory_budget_mb: 16000  # for the BioCypher write buffers of all running jobs
+#   jobs:
+#     journal:
+#       adapter: adapters.journal_adapter:JournalAdapter
+#       inputs: /nfs/.../J_Medline.txt  # file, directory or list: load_data(f) per file
+#     reactome:
+#       adapter: adapters.reactome_adapter:ReactomeAdapter
+#       inputs: {data: ..., rt2gene: ...}  # mapping: one load_data(**inputs)
+#     go:
+#       adapter: adapters.go_adapter:GOAdapter  # no inputs: load_data()
+#       depends_on: [journal]  # optional, starts after journal (ordering only, nothing is passed on)
+#       memory_budget_mb: 2000  # optional, else an equal share of the total
+#       batch_size: 100000  # optional, fixed instead of fitted to the budget
+#       labels: 8  # optional, labels per write if the adapter's node/edge types undercount them
+#
+# Every job runs in its own process with its own BioCypher instance writing to
+# {output_dir}/{job}; a job starts once the jobs it depends on have finished,
+# and is skipped if one of them failed. The per-job import scripts are merged
+# into {output_dir}/neo4j-admin-import-call.sh. BioCypher deduplicates within
+# a job only; set skip_duplicate_nodes in the BioCypher config for nodes that
+# several jobs write.
+#
+# Write batch sizes are fitted to each job's memory budget from the measured
+# bytes per record (see utils/memory_budget.py). The budget covers the write
+# buffers, not what adapters hold themselves in load_data.
+
+IMPORT_SCRIPT = 'neo4j-admin-import-call.sh'
+IMPORT_ARG = re.compile(r'--(nodes|relationships)(?:=|\s+)("[^"]*"|\S+)')
+
+
+def load_config(path:str):
+    if path.endswith('.toml'):
+        try:
+            import tomllib # Python 3.11+
+            with open(path, 'rb') as f:
+                config = tomllib.load(f)
+        except ImportError:
+            import toml
+            config = toml.load(path)
+    else:
+        import yaml
+        with open(path) as f:
+            config = yaml.safe_load(f)
+    jobs = config.get('jobs') or {}
+    for name, job in jobs.items():
+        if 'adapter' not in job:
+            raise ValueError(f"Job {name} has no adapter.")
+        for dep in job.get('depends_on', []):
+            if dep not in jobs:
+                raise ValueError(f"Job {name} depends on unknown job {dep}.")
+    order(jobs) # fail early on cycles
+    return config
+
+def order(jobs:dict):
+    """
+    Job names in dependency order; raises ValueError on a cycle.
+    """
+    done, ordered = set(), []
+    pending = dict(jobs)
+    while pending:
+        ready = [n for n, j in pending.items() if set(j.get('depends_on', [])) <= done]
+        if not ready:
+            raise ValueError(f"Dependency cycle among jobs {sorted(pending)}.")
+        for n in ready:
+            ordered.append(n)
+            done.add(n)
+            del pending[n]
+    return ordered
+
+def load_adapter(spec:str):
+    module, cls_name = spec.split(':')
+    return getattr(importlib.import_module(module), cls_name)
+
+def input_files(inputs):
+    """
+    (load_data arguments, file label) for each load_data call of a job.
+    """
+    if inputs is None:
+        return [((), None)]
+    if isinstance(inputs, dict):
+        return [(inputs, ','.join(os.path.basename(str(v)) for v in inputs.values()))]
+    paths = inputs if isinstance(inputs, list) else [inputs]
+    calls = []
+    for p in paths:
+        if os.path.isdir(p):
+            calls += [((os.path.join(p, f),), f) for f in sorted(os.listdir(p))]
+        elif os.path.exists(p):
+            calls.append(((p,), os.path.basename(p)))
+        else:
+            logger.warning(f"Input {p} does not exist, skipped.")
+    return calls
+
+
+def ingest(bc, report:BuildReport, adpt, load_args, file=None, budget_mb:float = DEFAULT_BUDGET_MB, batch_size=None,
+           labels:int = None):
+    """
+    Load one input with adpt and write its nodes and edges in batches fitted
+    to budget_mb (or of batch_size), recording each stage in the build report.
+    labels overrides the number of labels the adapter declares.
+    """
+    name = adpt.__name__
+    with report.stage(name, file, 'load'):
+        if isinstance(load_args, dict):
+            adapter = adpt().load_data(**load_args)
+        else:
+            adapter = adpt().load_data(*load_args)
+    output_dir = lambda: getattr(bc, '_output_directory', None)
+    for part, write, get_records in [('nodes', bc.write_nodes, adapter.get_nodes), ('edges', bc.write_edges, adapter.get_edges)]:
+        sizes = {}
+        def on_batch_size(size, per_record, n_labels):
+            sizes.update(batch_size=size, bytes_per_record=round(per_record) if per_record else None, labels=n_labels)
+        write = budgeted(write, budget_mb, batch_size, on_batch_size, labels=labels or declared_labels(adapter, part))
+        row = report.write_records(write, get_records, name, file, part, output_dir=output_dir)
+        row.update(sizes)
+
+def run_job(name:str, job:dict, biocypher_config:str, schema_config:str, output_dir:str,
+            budget_mb:float = DEFAULT_BUDGET_MB, progress_every:int = 0):
+    """
+    Runs in a worker process: builds one job into output_dir and returns its
+    import script, build report rows and peak RSS.
+    """
+    from biocypher import BioCypher
+    from utils.profiling import install_from_env
+    bc = BioCypher(biocypher_config_path=biocypher_config, schema_config_path=schema_config,
+                   output_directory=output_dir)
+    report = BuildReport(progress_every=progress_every)
+    adpt = load_adapter(job['adapter'])
+    install_from_env()
+    budget_mb = job.get('memory_budget_mb', budget_mb)
+    logger.debug(f"Running {name} ({adpt.__name__}) with a {budget_mb:.0f} MB write budget.")
+    for load_args, file in input_files(job.get('inputs')):
+        logger.debug(f"Processing data in {file}")
+        ingest(bc, report, adpt, load_args, file=file, budget_mb=budget_mb, batch_size=job.get('batch_size'),
+               labels=job.get('labels'))
+    script = bc.write_import_call()
+    return {'job': name, 'script': script, 'rows': report.rows, 'peak_rss_mb': peak_rss_mb()}
+
+
+def merge_import_calls(scripts:list, out_path:str):
+    """
+    Write one import script importing the nodes and relationships of all
+    scripts, with the options (and Neo4j version switch) of the first.
+    """
+    args = {'nodes': [], 'relationships': []}
+    for script in scripts:
+        with open(script) as f:
+            for kind, value in IMPORT_ARG.findall(f.read()):
+                if value not in args[kind]:
+                    args[kind].append(value)
+    with open(scripts[0]) as f:
+        template = f.read()
+
+    def replace(call):
+        # call: one neo4j-admin command line; keep its options, swap the file arguments
+        options = IMPORT_ARG.sub('', call.group(0)).rstrip()
+        files = ' '.join([f'--nodes={v}' for v in args['nodes']] + [f'--relationships={v}' for v in args['relationships']])
+        return f'{options} {files}'
+
+    merged = re.sub(r'[^\n]*neo4j-admin (?:import|database import)[^\n]*', replace, template)
+    with open(out_path, 'w') as f:
+        f.write(merged)
+    os.chmod(out_path, 0o755)
+    logger.info(f"Import call for {len(scripts)} jobs written to {out_path}.")
+    return out_path
+
+
+def build(config:dict, jobs:list = None, max_workers:int = None, progress_every:int = 0):
+    """
+    Run the jobs of config (all, or the named ones and their dependencies)
+    and merge their import calls. Returns the build report and the names of
+    failed and skipped jobs.
+    """
+    all_jobs = config['jobs']
+    selected = set(jobs or all_jobs)
+    stack = list(selected)
+    while stack: # add dependencies of selected jobs
+        for dep in all_jobs[stack.pop()].get('depends_on', []):
+            if dep not in selected:
+                selected.add(dep)
+                stack.append(dep)
+    pending = {n: all_jobs[n] for n in order(all_jobs) if n in selected}
+
+    output_dir = config.get('output_dir', 'biocypher-out/glkb')
+    max_workers = min(max_workers or config.get('max_workers') or os.cpu_count(), len(pending) or 1)
+    # the budget is shared by the jobs that run at the same time
+    budget_mb = config.get('memory_budget_mb', DEFAULT_BUDGET_MB * max_workers) / max_workers
+    report = BuildReport(progress_every=progress_every)
+    scripts, done, failed, skipped = {}, set(), [], []
+    running = {}
+    ctx = mp.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx) as pool:
+        while pending or running:
+            for name in list(pending):
+                deps = set(pending[name].get('depends_on', []))
+                if deps & set(failed + skipped):
+                    logger.warning(f"Skipping {name}: dependency failed.")
+                    skipped.append(name)
+                    del pending[name]
+                elif deps <= done:
+                    future = pool.submit(run_job, name, pending.pop(name), config['biocypher_config'],
+                                         config['schema_config'], os.path.join(output_dir, name), budget_mb, progress_every)
+                    running[future] = (name, time.perf_counter())
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, start = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Job {name} failed: {type(e).__name__}: {e}")
+                    failed.append(name)
+                    report.add(name, None, 'job', time.perf_counter() - start)
+                    continue
+                done.add(name)
+                scripts[name] = result['script']
+                report.rows += result['rows']
+                report.add(name, None, 'job', time.perf_counter() - start, peak_mb=result['peak_rss_mb'])
+                logger.info(f"Job {name} done in {time.perf_counter() - start:.0f}s, peak RSS {result['peak_rss_mb']:.0f} MB.")
+
+    if scripts:
+        merge_import_calls([scripts[n] for n in order(all_jobs) if n in scripts], os.path.join(output_dir, IMPORT_SCRIPT))
+    return report, failed, skipped
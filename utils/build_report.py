@@ -0,0 +1,131 @@
+import os
+import csv
+import sys
+import json
+import time
+import resource
+from contextlib import contextmanager
+from biocypher._logger import logger
+
+COLUMNS = ['adapter', 'file', 'stage', 'seconds', 'records', 'bytes_written', 'peak_rss_mb', 'batch_size', 'bytes_per_record', 'labels']
+
+
+def peak_rss_mb():
+    # peak of this process so far; ru_maxrss is in KB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1e6 if sys.platform == 'darwin' else rss / 1e3
+
+def dir_size(path:str):
+    if not path or not os.path.isdir(path):
+        return 0
+    return sum(e.stat().st_size for e in os.scandir(path) if e.is_file())
+
+
+class BuildReport:
+    """
+    Per adapter, input file and stage timings of a graph build, with record
+    counts, bytes written and peak RSS, written as JSON or CSV at the end.
+
+    Stages are 'load' (load_data) and, for nodes and edges, 'generate' (time
+    spent inside the adapter's generator) and 'write' (the rest of the
+    BioCypher write call), measured by wrapping the generator.
+
+    Args:
+        progress_every: log progress every this many records, 0 for none.
+    """
+    def __init__(self, progress_every:int = 0):
+        self.rows = []
+        self.progress_every = progress_every
+        self.start = time.perf_counter()
+
+    def add(self, adapter:str, file:str, stage:str, seconds:float, records:int = None, bytes_written:int = None,
+            peak_mb:float = None):
+        row = {'adapter': adapter, 'file': file, 'stage': stage, 'seconds': round(seconds, 3),
+               'records': records, 'bytes_written': bytes_written,
+               'peak_rss_mb': peak_mb if peak_mb is not None else peak_rss_mb(),
+               'batch_size': None, 'bytes_per_record': None, 'labels': None}
+        self.rows.append(row)
+        logger.debug(f"{adapter} {stage} {os.path.basename(str(file))}: {seconds:.1f}s"
+                     + (f", {records} records" if records is not None else ''))
+        return row
+
+    @contextmanager
+    def stage(self, adapter:str, file:str, stage:str):
+        start = time.perf_counter()
+        yield
+        self.add(adapter, file, stage, time.perf_counter() - start)
+
+    def counted(self, records, adapter:str, part:str, counter:dict):
+        """
+        Pass records through, adding the count and the time spent producing
+        them to counter.
+        """
+        it = iter(records or [])
+        while True:
+            start = time.perf_counter()
+            try:
+                record = next(it)
+            except StopIteration:
+                counter['seconds'] += time.perf_counter() - start
+                return
+            counter['seconds'] += time.perf_counter() - start
+            counter['records'] += 1
+            if self.progress_every and counter['records'] % self.progress_every == 0:
+                logger.info(f"{adapter}: {counter['records']:,} {part} so far, "
+                            f"{counter['records'] / max(counter['seconds'], 1e-9):,.0f}/s generated")
+            yield record
+
+    def write_records(self, write, get_records, adapter:str, file:str, part:str, output_dir=None, **write_args):
+        """
+        Run a BioCypher write call (bc.write_nodes or bc.write_edges) on the
+        records of get_records (e.g. adapter.get_nodes), splitting its time
+        into generation and writing. Returns the row of the write stage.
+
+        Args:
+            output_dir: callable returning the BioCypher output directory, for
+                the bytes written; it is only known after the first write.
+        """
+        counter = {'records': 0, 'seconds': 0.0}
+        before = dir_size(output_dir() if output_dir else None)
+        start = time.perf_counter()
+        try:
+            records = get_records() # adapters that build lists eagerly do it here
+            counter['seconds'] += time.perf_counter() - start
+            write(self.counted(records, adapter, part, counter), **write_args)
+        except StopIteration: # no records generated
+            pass
+        total = time.perf_counter() - start
+        written = dir_size(output_dir() if output_dir else None) - before
+        self.add(adapter, file, f'generate_{part}', counter['seconds'], records=counter['records'])
+        return self.add(adapter, file, f'write_{part}', total - counter['seconds'], records=counter['records'], bytes_written=written)
+
+    def summary(self):
+        """
+        Totals per adapter and stage.
+        """
+        totals = {}
+        for row in self.rows:
+            t = totals.setdefault((row['adapter'], row['stage']), {'seconds': 0.0, 'records': 0, 'bytes_written': 0})
+            t['seconds'] += row['seconds']
+            t['records'] += row['records'] or 0
+            t['bytes_written'] += row['bytes_written'] or 0
+        return [{'adapter': a, 'stage': s, **{k: round(v, 3) if isinstance(v, float) else v for k, v in t.items()}}
+                for (a, s), t in totals.items()]
+
+    def write(self, path:str):
+        """
+        Write the report to path, as CSV rows if it ends with .csv, else as
+        JSON with the rows, per adapter totals, wall time and peak RSS.
+        """
+        if path.endswith('.csv'):
+            with open(path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=COLUMNS)
+                writer.writeheader()
+                writer.writerows(self.rows)
+        else:
+            with open(path, 'w') as f:
+                peak = max([peak_rss_mb()] + [r['peak_rss_mb'] for r in self.rows]) # rows may come from job processes
+                json.dump({'wall_seconds': round(time.perf_counter() - self.start, 3), 'peak_rss_mb': peak,
+                           'summary': self.summary(), 'stages': self.rows}, f, indent=2)
+        logger.info(f"Build report written to {path}")
+        return path
@@ -0,0 +1,165 @@
+import os
+from collections import deque
+import numpy as np
+from biocypher._logger import logger
+from utils.ontology_snapshot import get_ontology_snapshot, SNAPSHOT_DIR
+
+FILES = ['terms', 'anc_indptr', 'anc_indices', 'desc_indptr', 'desc_indices']
+
+
+class ClosureIndex:
+    """
+    Transitive closure of an is_a hierarchy stored as two CSR integer arrays:
+    the sorted ancestors and the sorted descendants of every term. Terms are
+    numbered by their position in self.terms.
+    """
+    def __init__(self, terms, anc_indptr, anc_indices, desc_indptr, desc_indices):
+        self.terms = terms
+        self.anc_indptr = anc_indptr
+        self.anc_indices = anc_indices
+        self.desc_indptr = desc_indptr
+        self.desc_indices = desc_indices
+        self._term_index = None
+
+    @classmethod
+    def build(cls, edges, terms=None):
+        """
+        Args:
+            edges: iterable of (child, parent) pairs.
+            terms: optional extra terms without any hierarchy edge.
+        """
+        edges = [(str(c), str(p)) for c, p in edges]
+        all_terms = set(terms or [])
+        for c, p in edges:
+            all_terms.add(c)
+            all_terms.add(p)
+        all_terms = np.array(sorted(all_terms), dtype=str)
+        index = {t: i for i, t in enumerate(all_terms)}
+        n = len(all_terms)
+
+        parents = [[] for _ in range(n)]
+        for c, p in edges:
+            parents[index[c]].append(index[p])
+
+        # roots first: a term is processed once all of its parents are
+        children = [[] for _ in range(n)]
+        for c in range(n):
+            for p in parents[c]:
+                children[p].append(c)
+        n_parents = np.array([len(p) for p in parents], dtype=np.int64)
+        queue = deque(np.flatnonzero(n_parents == 0).tolist())
+        ancestors = [None] * n
+        while queue:
+            i = queue.popleft()
+            if parents[i]:
+                ancestors[i] = np.unique(np.concatenate(
+                    [np.array(parents[i], dtype=np.int32)] + [ancestors[p] for p in parents[i]]))
+            else:
+                ancestors[i] = np.empty(0, dtype=np.int32)
+            for c in children[i]:
+                n_parents[c] -= 1
+                if n_parents[c] == 0:
+                    queue.append(c)
+        cyclic = [i for i in range(n) if ancestors[i] is None]
+        if cyclic:
+            logger.warning(f"{len(cyclic)} terms are part of is_a cycles, their closure is partial.")
+            for i in cyclic:
+                known = [ancestors[p] for p in parents[i] if ancestors[p] is not None]
+                ancestors[i] = np.unique(np.concatenate([np.array(parents[i], dtype=np.int32)] + known))
+
+        anc_indptr = np.zeros(n + 1, dtype=np.int64)
+        anc_indptr[1:] = np.cumsum([len(a) for a in ancestors])
+        anc_indices = np.concatenate(ancestors).astype(np.int32) if n else np.empty(0, dtype=np.int32)
+
+        # descendants are the transpose of the ancestor matrix
+        rows = np.repeat(np.arange(n, dtype=np.int32), np.diff(anc_indptr))
+        order = np.lexsort((rows, anc_indices))
+        desc_indices = rows[order]
+        desc_indptr = np.zeros(n + 1, dtype=np.int64)
+        desc_indptr[1:] = np.cumsum(np.bincount(anc_indices, minlength=n))
+        return cls(all_terms, anc_indptr, anc_indices, desc_indptr, desc_indices)
+
+    @classmethod
+    def load(cls, path:str, mmap:bool = True):
+        mode = 'r' if mmap else None
+        arrays = [np.load(os.path.join(path, f'{f}.npy'), mmap_mode=mode) for f in FILES]
+        return cls(*arrays)
+
+    def save(self, path:str):
+        os.makedirs(path, exist_ok=True)
+        for f in FILES:
+            # temp names first, as in OntologySnapshot.write: get_closure_index
+            # takes the index as built once every file exists
+            with open(os.path.join(path, f'{f}.npy.tmp'), 'wb') as fh:
+                np.save(fh, getattr(self, f))
+        for f in FILES:
+            os.replace(os.path.join(path, f'{f}.npy.tmp'), os.path.join(path, f'{f}.npy'))
+        return path
+
+    @property
+    def term_index(self):
+        if self._term_index is None:
+            self._term_index = {t: i for i, t in enumerate(self.terms.tolist())}
+        return self._term_index
+
+    def __len__(self):
+        return len(self.terms)
+
+    def _row(self, indptr, indices, term):
+        i = self.term_index.get(str(term))
+        if i is None:
+            return np.empty(0, dtype=np.int32)
+        return indices[indptr[i]:indptr[i + 1]]
+
+    def ancestors(self, term:str):
+        """
+        All terms above term in the hierarchy.
+        """
+        return set(self.terms[self._row(self.anc_indptr, self.anc_indices, term)].tolist())
+
+    def descendants(self, term:str):
+        """
+        All terms below term in the hierarchy, as pyobo's Obo.descendants.
+        """
+        return set(self.terms[self._row(self.desc_indptr, self.desc_indices, term)].tolist())
+
+    def is_ancestor(self, ancestor:str, term:str):
+        """
+        Binary search of ancestor in the sorted ancestor row of term.
+        """
+        a = self.term_index.get(str(ancestor))
+        row = self._row(self.anc_indptr, self.anc_indices, term)
+        if a is None or len(row) == 0:
+            return False
+        pos = np.searchsorted(row, a)
+        return pos < len(row) and row[pos] == a
+
+    def partition(self, roots:dict):
+        """
+        Assign terms to the label of every root they descend from.
+
+        Args:
+            roots: label to root term, e.g. go_adapter.ID.
+        Returns:
+            dict of label to the list of descendant terms of its root.
+        """
+        return {
+            label: self.terms[self._row(self.desc_indptr, self.desc_indices, root)].tolist()
+            for label, root in roots.items()
+        }
+
+
+def get_closure_index(prefix:str, snapshot_dir:str = SNAPSHOT_DIR, snapshot=None):
+    """
+    Load the closure index stored next to the ontology snapshot of prefix,
+    building and persisting it from the snapshot's hierarchy on first use.
+    """
+    snapshot = snapshot or get_ontology_snapshot(prefix, snapshot_dir=snapshot_dir)
+    path = os.path.join(snapshot_dir, prefix, snapshot.version, 'closure')
+    if all(os.path.exists(os.path.join(path, f'{f}.npy')) for f in FILES):
+        return ClosureIndex.load(path)
+    logger.info(f"Building closure index for {prefix} v{snapshot.version}.")
+    df = snapshot.tables['hierarchy']
+    closure = ClosureIndex.build(zip(df['child'], df['parent']))
+    closure.save(path)
+    return ClosureIndex.load(path)
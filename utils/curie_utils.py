@@ -0,0 +1,67 @@
+import pandas as pd
+
+# source name: (prefix, separator, zero padding of the local id)
+CURIE_RULES = {
+    'pmid': ('pmid', '', None),
+    'nlmid': ('nlmid', '', None),
+    'reactome': ('reactome', ':', None),
+    'go': ('go', ':', None),
+    'HPO': ('hp', ':', 7),
+    'MONDO': ('mondo', ':', 7),
+    'GO': ('go', ':', 7),
+    'UBERON': ('uberon', ':', 7),
+    'REACTOME': ('reactome', ':', None),
+}
+
+
+def to_curie(ids: pd.Series, prefix: str, sep: str = ':', zfill: int = None):
+    """
+    Prefix a whole column of local ids, e.g. to_curie(df['id'], 'reactome').
+    Missing values stay missing.
+    """
+    local = ids.astype(str)
+    if zfill:
+        local = local.str.zfill(zfill)
+    return (prefix + sep + local).where(ids.notna())
+
+
+def apply_curie_rule(ids: pd.Series, source: str):
+    """
+    Build curies for a column of ids with the CURIE_RULES entry of source.
+    """
+    prefix, sep, zfill = CURIE_RULES[source]
+    return to_curie(ids, prefix, sep=sep, zfill=zfill)
+
+
+def pmid_if_numeric(ids: pd.Series):
+    """
+    'pmid123' for numeric ids, other values are kept as they are.
+    """
+    local = ids.astype(str)
+    return ids.where(~local.str.isnumeric(), 'pmid' + local)
+
+
+def split_curie(ids: pd.Series, delimiter: str = '_', prefixes: set = None, aliases: dict = None, n_parts: int = None):
+    """
+    Turn 'PREFIX_local' style ids into 'prefix:local' curies column-wide.
+
+    Args:
+        ids: column of ids.
+        delimiter: separator between prefix and local id.
+        prefixes: if given, curies whose prefix is not in the set become NaN.
+        aliases: raw prefix to prefix replacements applied before lowercasing,
+            e.g. {'hugo.owl#hgnc': 'hgnc'}.
+        n_parts: if given, ids that do not split into exactly n_parts become NaN.
+    """
+    parts = ids.astype(str).str.split(delimiter)
+    prefix = parts.str[0]
+    if aliases:
+        prefix = prefix.replace(aliases)
+    prefix = prefix.str.lower()
+    curies = prefix + ':' + parts.str[1]
+    keep = ids.notna() & parts.str[1].notna()
+    if n_parts:
+        keep &= parts.str.len() == n_parts
+    if prefixes is not None:
+        keep &= prefix.isin(prefixes)
+    return curies.where(keep)
@@ -0,0 +1,37 @@
+import os
+
+
+def newline_aligned_chunks(file:str, chunk_size:int = 64 * 1024 * 1024):
+    """
+    Split a text file into (start, end) byte ranges of roughly chunk_size bytes.
+    Every range starts at the beginning of a line and ends right after a newline
+    (or at EOF), so each chunk can be parsed independently.
+    """
+    size = os.path.getsize(file)
+    offsets = []
+    with open(file, 'rb') as f:
+        start = 0
+        while start < size:
+            end = min(start + chunk_size, size)
+            if end < size:
+                f.seek(end)
+                f.readline() # move to the end of the current line
+                end = f.tell()
+            offsets.append((start, end))
+            start = end
+    return offsets
+
+
+def read_chunk_lines(file:str, start:int, end:int):
+    """
+    Yield decoded lines, without the newline, in the byte range [start, end)
+    of a file. Lines end at '\n' only, like newline_aligned_chunks; str
+    splitlines() would also break them at e.g. '\x1c', '\x85' or '\u2028'.
+    """
+    with open(file, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    lines = data.decode('utf-8').split('\n')
+    if lines and lines[-1] == '': # the chunk ends with a newline
+        lines.pop()
+    yield from lines
@@ -1,33 +1,186 @@
+import os
+import json
+import shutil
+import tempfile
+from collections.abc import Mapping
+import numpy as np
 import pandas as pd
+from biocypher._logger import logger
+
+BIOMART_FILE = '/nfs/turbo/umms-drjieliu/proj/medlineKG/data/ensembl_biomart/biomart220516.txt'
+DRUGBANK_FILE = '/nfs/turbo/umms-drjieliu/proj/medlineKG/data/ontologies/chebi/drug-mappings.tsv'
+
+# Mapping tables are compiled once from their source file into sorted key and
+# value arrays, stored next to it in {source}.compiled/{namespace}.{keys,values}.npy
+# and memory-mapped on load; the source's size and mtime are recorded so an
+# updated file is recompiled. get_biomart_mapper() / get_drugbank_mapper() share
+# one loaded instance per process.
+
+
+class MappingTable(Mapping):
+    """
+    Read-only str -> str mapping over sorted key and value arrays. Single
+    lookups are binary searches; map() looks up a whole column at once.
+    Being a Mapping, it also works where a dict did, e.g. Series.map(table).
+    """
+    def __init__(self, keys, values):
+        self.keys_ = keys
+        self.values_ = values
+
+    @classmethod
+    def build(cls, keys, values):
+        """
+        Sort and de-duplicate key/value pairs; for duplicated keys the last
+        value wins, as in dict(zip(keys, values)).
+        """
+        keys = np.asarray(keys, dtype=str)
+        values = np.asarray(values, dtype=str)
+        order = np.argsort(keys, kind='stable')
+        keys, values = keys[order], values[order]
+        keep = np.ones(len(keys), dtype=bool)
+        keep[:-1] = keys[:-1] != keys[1:]
+        return cls(keys[keep], values[keep])
+
+    def save(self, path:str, namespace:str):
+        np.save(os.path.join(path, f'{namespace}.keys.npy'), self.keys_)
+        np.save(os.path.join(path, f'{namespace}.values.npy'), self.values_)
+
+    @classmethod
+    def load(cls, path:str, namespace:str):
+        return cls(np.load(os.path.join(path, f'{namespace}.keys.npy'), mmap_mode='r'),
+                   np.load(os.path.join(path, f'{namespace}.values.npy'), mmap_mode='r'))
+
+    def _position(self, key):
+        if not isinstance(key, str) or not len(self.keys_):
+            return None
+        pos = int(np.searchsorted(self.keys_, key))
+        if pos < len(self.keys_) and self.keys_[pos] == key:
+            return pos
+        return None
+
+    def __getitem__(self, key):
+        pos = self._position(key)
+        if pos is None:
+            raise KeyError(key)
+        return str(self.values_[pos])
+
+    def __contains__(self, key):
+        return self._position(key) is not None
+
+    def __iter__(self):
+        return (str(k) for k in self.keys_)
+
+    def __len__(self):
+        return len(self.keys_)
+
+    def map(self, ids:pd.Series):
+        """
+        ids.map(self) with one vectorized search: mapped values, NaN where an
+        id is missing or has no mapping.
+        """
+        out = pd.Series(np.nan, index=ids.index, dtype=object)
+        if not len(self.keys_) or not len(ids):
+            return out
+        valid = ids.notna().to_numpy()
+        query = ids[valid].astype(str).to_numpy(dtype=str)
+        pos = np.minimum(np.searchsorted(self.keys_, query), len(self.keys_) - 1)
+        found = self.keys_[pos] == query
+        values = np.full(len(query), np.nan, dtype=object)
+        values[found] = self.values_[pos[found]]
+        out[valid] = values
+        return out
+
+
+def _source_stamp(file:str):
+    stat = os.stat(file)
+    return {'source': os.path.abspath(file), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+def compiled_tables(file:str, compile_tables, namespaces:list):
+    """
+    MappingTables of file, compiling them with compile_tables(file) (a dict of
+    namespace to (keys, values)) when no up to date compiled copy exists.
+    """
+    path = file + '.compiled'
+    stamp = _source_stamp(file)
+    meta = os.path.join(path, 'source.json')
+    if os.path.exists(meta):
+        with open(meta) as f:
+            if json.load(f) == stamp:
+                return {n: MappingTable.load(path, n) for n in namespaces}
+        shutil.rmtree(path, ignore_errors=True)
+    logger.info(f"Compiling mapping tables of {file}.")
+    tables = {n: MappingTable.build(*kv) for n, kv in compile_tables(file).items()}
+    # build in a temporary directory and rename, so concurrent builds never see a partial copy
+    tmp = None
+    try:
+        tmp = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(path)), prefix='.mapper')
+        for n, table in tables.items():
+            table.save(tmp, n)
+        with open(os.path.join(tmp, 'source.json'), 'w') as f:
+            json.dump(stamp, f)
+        os.rename(tmp, path)
+    except OSError: # another process compiled it first, or the source directory is read-only
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+        logger.debug(f"Using the mapping tables of {file} without a compiled copy.")
+        return tables
+    return {n: MappingTable.load(path, n) for n in namespaces}
+
+
+def _hgnc_local(ids:pd.Series):
+    return ids.astype(str).str.split(':').str[-1]
+
+def compile_biomart(file:str):
+    df = pd.read_csv(file, sep='\t')
+    # entrez to hgnc
+    sub_df = df[['HGNC ID', 'NCBI gene (formerly Entrezgene) ID']].dropna()
+    entrez2hgnc = (sub_df['NCBI gene (formerly Entrezgene) ID'].astype(int).astype(str), _hgnc_local(sub_df['HGNC ID']))
+    # ensembl to hgnc
+    sub_df = df[['HGNC ID', 'Gene stable ID']].dropna()
+    ensembl2hgnc = (sub_df['Gene stable ID'], _hgnc_local(sub_df['HGNC ID']))
+    sub_df = df[['HGNC ID', 'Gene name', 'Gene Synonym']].dropna()
+    name2hgnc = (sub_df['Gene name'], _hgnc_local(sub_df['HGNC ID']))
+    syn2hgnc = (sub_df['Gene Synonym'], _hgnc_local(sub_df['HGNC ID']))
+    return {'entrez':entrez2hgnc, 'ensembl':ensembl2hgnc, 'short name':name2hgnc, 'symbol':syn2hgnc}
+
+def compile_drugbank(file:str):
+    mappings = pd.read_csv(file, sep='\t')
+    mappings.columns = [t.strip() for t in mappings.columns]
+    mappings = mappings[['drugbankId', 'chebi_id']].copy()
+    mappings['drugbankId'] = mappings['drugbankId'].str.strip()
+    mappings['chebi_id'] = mappings['chebi_id'].str.strip()
+    mappings = mappings[(mappings['chebi_id']!='null') & (mappings['drugbankId']!='null')]
+    mappings = mappings.dropna()
+    return {'drugbank': (mappings['drugbankId'], mappings['chebi_id'])}
+
 
 class biomart_mapper:
-    def __init__(self, file:str = '/nfs/turbo/umms-drjieliu/proj/medlineKG/data/ensembl_biomart/biomart220516.txt'):
-        df = pd.read_csv(file, sep='\t')
-        # entrez to hgnc
-        sub_df = df[['HGNC ID', 'NCBI gene (formerly Entrezgene) ID']].dropna()
-        entrez2hgnc = dict(zip(sub_df['NCBI gene (formerly Entrezgene) ID'].astype(int).astype(str), sub_df['HGNC ID'].astype(str).apply(lambda x: x.split(':')[-1])))
-        # ensembl to hgnc
-        sub_df = df[['HGNC ID', 'Gene stable ID']].dropna()
-        ensembl2hgnc = dict(zip(sub_df['Gene stable ID'], sub_df['HGNC ID'].astype(str).apply(lambda x: x.split(':')[-1])))
-        # self.mappings = {**self.mappings, **entrez2hgnc, **ensembl2hgnc}
-        sub_df = df[['HGNC ID', 'Gene name', 'Gene Synonym']].dropna()
-        name2hgnc = dict(zip(sub_df['Gene name'], sub_df['HGNC ID'].astype(str).apply(lambda x: x.split(':')[-1])))
-        syn2hgnc = dict(zip(sub_df['Gene Synonym'], sub_df['HGNC ID'].astype(str).apply(lambda x: x.split(':')[-1])))
-        m = {'entrez':entrez2hgnc, 'ensembl':ensembl2hgnc, 'short name':name2hgnc, 'symbol':syn2hgnc}
-        self.mapper = m
+    def __init__(self, file:str = BIOMART_FILE):
+        self.mapper = compiled_tables(file, compile_biomart, ['entrez', 'ensembl', 'short name', 'symbol'])
     def get(self, id, namespace):
         return self.mapper.get(namespace).get(id)
 
 class drugbank_mapper:
-    def __init__(self, file:str = '/nfs/turbo/umms-drjieliu/proj/medlineKG/data/ontologies/chebi/drug-mappings.tsv'):
-        mappings = pd.read_csv(file, sep='\t')
-        mappings.columns = [t.strip() for t in mappings.columns]
-        mappings = mappings[['drugbankId', 'chebi_id']]
-        mappings['drugbankId'] = mappings['drugbankId'].str.strip()
-        mappings['chebi_id'] = mappings['chebi_id'].str.strip()
-        mappings = mappings[(mappings['chebi_id']!='null') & (mappings['drugbankId']!='null')]
-        mappings = mappings.dropna()
-        m = {'drugbank': dict(zip(mappings['drugbankId'], mappings['chebi_id']))}
-        self.mapper = m
+    def __init__(self, file:str = DRUGBANK_FILE):
+        self.mapper = compiled_tables(file, compile_drugbank, ['drugbank'])
     def get(self, id, namespace='drugbank'):
-        return self.mapper.get(namespace).get(id)
\ No newline at end of file
+        return self.mapper.get(namespace).get(id)
+
+
+_MAPPERS = {}
+
+def get_biomart_mapper(file:str = BIOMART_FILE):
+    """
+    The process-wide biomart_mapper of file, loaded on first use.
+    """
+    if ('biomart', file) not in _MAPPERS:
+        _MAPPERS[('biomart', file)] = biomart_mapper(file)
+    return _MAPPERS[('biomart', file)]
+
+def get_drugbank_mapper(file:str = DRUGBANK_FILE):
+    """
+    The process-wide drugbank_mapper of file, loaded on first use.
+    """
+    if ('drugbank', file) not in _MAPPERS:
+        _MAPPERS[('drugbank', file)] = drugbank_mapper(file)
+    return _MAPPERS[('drugbank', file)]
@@ -0,0 +1,141 @@
+import os
+from collections import defaultdict
+import pandas as pd
+from biocypher._logger import logger
+
+SNAPSHOT_DIR = '/nfs/turbo/umms-drjieliu/proj/medlineKG/data/ontologies/snapshots'
+TABLES = ['names', 'synonyms', 'definitions', 'relations', 'hierarchy']
+
+
+class OntologySnapshot:
+    """
+    Extracted content of an OBO ontology, persisted as Parquet tables under
+    {snapshot_dir}/{prefix}/{version}/. Exposes the subset of the pyobo Obo
+    API the adapters use, so it can stand in for pyobo.get_ontology(prefix).
+    """
+    def __init__(self, prefix:str, version:str, tables:dict):
+        self.prefix = prefix
+        self.version = version
+        self.tables = tables
+        self._children = None
+
+    @classmethod
+    def from_obo(cls, prefix:str, onto, version:str = None):
+        names = onto.get_id_name_mapping()
+        synonyms = onto.get_id_synonyms_mapping()
+        definitions = onto.get_id_definition_mapping()
+        relations = onto.get_relations_df()
+        relations.columns = [str(c) for c in relations.columns]
+        hierarchy = list(onto.hierarchy.edges()) # child -> parent
+        tables = {
+            'names': pd.DataFrame({'id': list(names.keys()), 'name': list(names.values())}),
+            'synonyms': pd.DataFrame(
+                [(i, s) for i, syns in synonyms.items() for s in syns], columns=['id', 'synonym']),
+            'definitions': pd.DataFrame({'id': list(definitions.keys()), 'definition': list(definitions.values())}),
+            'relations': relations,
+            'hierarchy': pd.DataFrame(hierarchy, columns=['child', 'parent']),
+        }
+        # missing values as '' rather than the strings 'None' / 'nan'
+        tables = {t: df.fillna('').astype(str) for t, df in tables.items()}
+        return cls(prefix, version or 'unknown', tables)
+
+    @classmethod
+    def read(cls, path:str, prefix:str, version:str):
+        tables = {t: pd.read_parquet(os.path.join(path, f'{t}.parquet')) for t in TABLES}
+        return cls(prefix, version, tables)
+
+    def write(self, path:str):
+        os.makedirs(path, exist_ok=True)
+        for t, df in self.tables.items():
+            # write to a temp name first so a crash never leaves a half snapshot
+            df.to_parquet(os.path.join(path, f'{t}.parquet.tmp'), index=False)
+        for t in self.tables:
+            os.replace(os.path.join(path, f'{t}.parquet.tmp'), os.path.join(path, f'{t}.parquet'))
+        return path
+
+    def get_id_name_mapping(self):
+        df = self.tables['names']
+        return dict(zip(df['id'], df['name']))
+
+    def get_id_synonyms_mapping(self):
+        synonyms = defaultdict(list)
+        df = self.tables['synonyms']
+        for i, s in zip(df['id'], df['synonym']):
+            synonyms[i].append(s)
+        return dict(synonyms)
+
+    def get_id_definition_mapping(self):
+        df = self.tables['definitions']
+        return dict(zip(df['id'], df['definition']))
+
+    def get_relations_df(self):
+        return self.tables['relations'].copy()
+
+    def descendants(self, identifier:str):
+        """
+        All terms below identifier in the is_a hierarchy, as pyobo's
+        Obo.descendants.
+        """
+        if self._children is None:
+            self._children = defaultdict(list)
+            df = self.tables['hierarchy']
+            for child, parent in zip(df['child'], df['parent']):
+                self._children[parent].append(child)
+        seen = set()
+        stack = [identifier]
+        while stack:
+            for child in self._children.get(stack.pop(), []):
+                if child not in seen:
+                    seen.add(child)
+                    stack.append(child)
+        return seen
+
+
+def _resolve_version(prefix:str):
+    try:
+        import pyobo.api.utils
+        return pyobo.api.utils.get_version(prefix)
+    except Exception as e: # offline, or the registry has no version
+        logger.debug(f"Could not resolve version of {prefix}: {e}")
+        return None
+
+
+def _latest_snapshot(prefix_dir:str):
+    if not os.path.isdir(prefix_dir):
+        return None
+    versions = [
+        v for v in os.listdir(prefix_dir)
+        if all(os.path.exists(os.path.join(prefix_dir, v, f'{t}.parquet')) for t in TABLES)
+    ]
+    if not versions:
+        return None
+    return max(versions, key=lambda v: os.path.getmtime(os.path.join(prefix_dir, v)))
+
+
+def get_ontology_snapshot(prefix:str, snapshot_dir:str = SNAPSHOT_DIR, version:str = None, force:bool = False):
+    """
+    Return an OntologySnapshot for prefix, parsing with pyobo only when no
+    snapshot exists for the requested version.
+
+    Args:
+        prefix: ontology prefix, e.g. 'mondo'.
+        snapshot_dir: root directory of the snapshots.
+        version: ontology version; resolved with pyobo when not given. If it
+            cannot be resolved (e.g. offline), the latest snapshot on disk is used.
+        force: re-parse and overwrite an existing snapshot.
+    """
+    prefix_dir = os.path.join(snapshot_dir, prefix)
+    version = version or _resolve_version(prefix)
+    if version is None and not force:
+        version = _latest_snapshot(prefix_dir)
+    if version is not None and not force:
+        path = os.path.join(prefix_dir, str(version))
+        if all(os.path.exists(os.path.join(path, f'{t}.parquet')) for t in TABLES):
+            logger.info(f"Loading {prefix} v{version} from snapshot.")
+            return OntologySnapshot.read(path, prefix, str(version))
+
+    import pyobo
+    logger.info(f"Parsing {prefix} with pyobo and writing snapshot.")
+    snapshot = OntologySnapshot.from_obo(prefix, pyobo.get_ontology(prefix), version=version)
+    snapshot.write(os.path.join(prefix_dir, snapshot.version))
+    return snapshot
@@ -0,0 +1,274 @@
+import os
+import sys
+import time
+import atexit
+import cProfile
+import pstats
+import importlib
+import threading
+import tracemalloc
+import functools
+import inspect
+from collections import Counter
+from biocypher._logger import logger
+
+# Opt-in profiling of named stages, e.g.
+#   GLKB_PROFILE="PubmedAdapter.get_nodes,BiomedicalNER.extract_entities=sample,Custom_Grounder.ground=tracemalloc"
+#   GLKB_PROFILE_DIR=profiles/
+# A stage is Class.method (classes of KNOWN_MODULES) or module:Class.method.
+# Modes: cprofile (default), tracemalloc, sample. install() replaces the named
+# methods with profiled wrappers; nothing is patched unless profiling is asked
+# for, so the disabled cost is zero. Results are written per stage and process
+# at exit.
+
+PROFILE_ENV = 'GLKB_PROFILE'
+PROFILE_DIR_ENV = 'GLKB_PROFILE_DIR'
+MODES = ('cprofile', 'tracemalloc', 'sample')
+
+# where the classes of short stage names live; the gilda grounders are loaded
+# as a top-level module by information_extraction.NER
+KNOWN_MODULES = {
+    'PubmedAdapter': ['adapters.pubmed_adapter'],
+    'JournalAdapter': ['adapters.journal_adapter'],
+    'dbSNPAdapter': ['adapters.dbsnp_adapter'],
+    'ReactomeAdapter': ['adapters.reactome_adapter'],
+    'PrimeKGAdapter': ['adapters.primekg_adapter'],
+    'GWASAdapter': ['adapters.gwas_adapter'],
+    'GOAdapter': ['adapters.go_adapter'],
+    'OntologyAdapter': ['adapters.vocab_adapter'],
+    'OMAdapter': ['adapters.vocab_adapter'],
+    'NERAdapter': ['adapters.ner_adapter'],
+    'BiomedicalNER': ['information_extraction.NER'],
+    'SentenceSegmenter': ['utils.sentence_segmenter'],
+    'Custom_Grounder': ['gilda_grounders', 'information_extraction.gilda_grounders'],
+    'Variant_Grounder': ['gilda_grounders', 'information_extraction.gilda_grounders'],
+}
+
+
+class StageProfiler:
+    """
+    Collects one profile of a stage across all its calls in this process.
+    Nested calls of the same stage are profiled once, by the outermost call.
+    """
+    def __init__(self, stage:str, mode:str, out_dir:str, interval:float = 0.005):
+        self.stage = stage
+        self.mode = mode
+        self.out_dir = out_dir
+        self.interval = interval
+        self.calls = 0
+        self.seconds = 0.0
+        self.depth = threading.local()
+        self.profile = cProfile.Profile() if mode == 'cprofile' else None
+        self.memory = [] # (call, peak bytes, top allocation lines)
+        self.stacks = Counter()
+        self.active_threads = set()
+        self.sampler = None
+        self.warned = False
+
+    def enter(self):
+        depth = getattr(self.depth, 'n', 0)
+        self.depth.n = depth + 1
+        if depth:
+            return
+        self.calls += 1
+        self._start = time.perf_counter()
+        if self.mode == 'cprofile':
+            try:
+                self.profile.enable()
+            except ValueError: # another stage's profiler is already running
+                if not self.warned:
+                    logger.warning(f"Cannot cProfile {self.stage} inside another profiled stage.")
+                    self.warned = True
+        elif self.mode == 'tracemalloc':
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            self._before = tracemalloc.take_snapshot()
+        elif self.mode == 'sample':
+            self.active_threads.add(threading.get_ident())
+            if self.sampler is None:
+                self.sampler = threading.Thread(target=self._sample, daemon=True)
+                self.sampler.start()
+
+    def exit(self):
+        self.depth.n -= 1
+        if self.depth.n:
+            return
+        self.seconds += time.perf_counter() - self._start
+        if self.mode == 'cprofile':
+            self.profile.disable()
+        elif self.mode == 'tracemalloc':
+            _, peak = tracemalloc.get_traced_memory()
+            diff = tracemalloc.take_snapshot().compare_to(self._before, 'lineno')
+            self.memory.append((self.calls, peak, [str(d) for d in diff[:10]]))
+            self.memory = sorted(self.memory, key=lambda m: -m[1])[:20] # the 20 heaviest calls
+        elif self.mode == 'sample':
+            self.active_threads.discard(threading.get_ident())
+
+    def _sample(self):
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            for ident in list(self.active_threads):
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    stack.append(f"{frame.f_code.co_name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                if stack:
+                    self.stacks[';'.join(reversed(stack))] += 1
+
+    def dump(self):
+        if not self.calls:
+            return None
+        os.makedirs(self.out_dir, exist_ok=True)
+        base = os.path.join(self.out_dir, f"{self.stage.replace(':', '.')}.{os.getpid()}")
+        header = f"{self.stage}: {self.calls} calls, {self.seconds:.3f}s\n"
+        if self.mode == 'cprofile':
+            self.profile.dump_stats(base + '.prof') # for snakeviz / pstats
+            with open(base + '.txt', 'w') as f:
+                f.write(header)
+                pstats.Stats(self.profile, stream=f).sort_stats('cumulative').print_stats(40)
+            return base + '.prof'
+        if self.mode == 'tracemalloc':
+            with open(base + '.tracemalloc.txt', 'w') as f:
+                f.write(header)
+                for call, peak, lines in self.memory:
+                    f.write(f"\ncall {call}: peak {peak / 1e6:.1f} MB traced\n")
+                    f.writelines(f"  {l}\n" for l in lines)
+            return base + '.tracemalloc.txt'
+        # folded stacks, for flamegraph.pl or speedscope
+        with open(base + '.folded', 'w') as f:
+            for stack, n in self.stacks.most_common():
+                f.write(f"{stack} {n}\n")
+        return base + '.folded'
+
+
+def profiled(method, profiler:StageProfiler):
+    """
+    Wrap method so its calls run under profiler. For generator methods
+    (e.g. the adapters' get_nodes) every resumption is profiled, not just the
+    creation of the generator.
+    """
+    if inspect.isgeneratorfunction(method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            gen = method(*args, **kwargs)
+            while True:
+                profiler.enter()
+                try:
+                    item = next(gen)
+                except StopIteration:
+                    return
+                finally:
+                    profiler.exit()
+                yield item
+    else:
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            profiler.enter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                profiler.exit()
+    wrapper.__profiled__ = profiler
+    return wrapper
+
+
+def parse_spec(spec:str):
+    """
+    'A.f,B.g=sample' -> [('A.f', 'cprofile'), ('B.g', 'sample')]
+    """
+    stages = []
+    for item in filter(None, (s.strip() for s in spec.split(','))):
+        stage, _, mode = item.partition('=')
+        mode = mode or 'cprofile'
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode {mode!r} for {stage}, use one of {MODES}")
+        stages.append((stage, mode))
+    return stages
+
+def _targets(stage:str):
+    """
+    (class, method name) pairs a stage name refers to.
+    """
+    if ':' in stage:
+        module, qualname = stage.split(':', 1)
+        modules = [module]
+    else:
+        qualname = stage
+        modules = KNOWN_MODULES.get(qualname.split('.')[0], [])
+    cls_name, _, method = qualname.rpartition('.')
+    targets = []
+    for module in modules:
+        try:
+            mod = importlib.import_module(module)
+        except ImportError:
+            continue
+        cls = getattr(mod, cls_name, None)
+        if cls is not None and hasattr(cls, method):
+            targets.append((cls, method))
+    return targets
+
+
+_PROFILERS = {}
+
+def install(spec:str, out_dir:str = 'profiles'):
+    """
+    Profile the stages of spec (see parse_spec) from now on. Stages are
+    patched in the modules importable at this point; call again after late
+    imports (e.g. in worker processes). Returns the profiled stage names.
+    """
+    for stage, mode in parse_spec(spec):
+        targets = _targets(stage)
+        if not targets:
+            logger.warning(f"Profiling stage {stage} not found.")
+            continue
+        profiler = _PROFILERS.get(stage)
+        if profiler is None:
+            profiler = _PROFILERS[stage] = StageProfiler(stage, mode, out_dir)
+        for cls, method in targets:
+            current = cls.__dict__.get(method, getattr(cls, method))
+            if getattr(current, '__profiled__', None) is profiler:
+                continue
+            wrapped = profiled(current.__func__ if isinstance(current, (staticmethod, classmethod)) else current, profiler)
+            if isinstance(current, staticmethod):
+                wrapped = staticmethod(wrapped)
+            elif isinstance(current, classmethod):
+                wrapped = classmethod(wrapped)
+            setattr(cls, method, wrapped)
+        logger.info(f"Profiling {stage} with {mode}.")
+    if _PROFILERS and not getattr(install, '_registered', False):
+        atexit.register(dump)
+        install._registered = True
+    return list(_PROFILERS)
+
+def install_from_env():
+    """
+    install() from GLKB_PROFILE and GLKB_PROFILE_DIR; does nothing if unset.
+    """
+    spec = os.environ.get(PROFILE_ENV)
+    if spec:
+        return install(spec, os.environ.get(PROFILE_DIR_ENV, 'profiles'))
+    return []
+
+def dump():
+    """
+    Write the results of every profiled stage, see StageProfiler.dump.
+    """
+    for profiler in _PROFILERS.values():
+        path = profiler.dump()
+        if path:
+            logger.info(f"Profile of {profiler.stage} written to {path}")
+
+def configure(argv:list = None):
+    """
+    Profiling setup for scripts: --profile SPEC and --profile-dir DIR in argv
+    take precedence over the environment and are exported to it, so worker
+    processes started later profile the same stages.
+    """
+    argv = sys.argv if argv is None else argv
+    for flag, env in [('--profile', PROFILE_ENV), ('--profile-dir', PROFILE_DIR_ENV)]:
+        if flag in argv and argv.index(flag) + 1 < len(argv):
+            os.environ[env] = argv[argv.index(flag) + 1]
+    return install_from_env()
@@ -0,0 +1,147 @@
+import os
+import re
+import numpy as np
+
+RSIDS = 'rsids.npy'
+ALLELE_OFFSETS = 'allele_offsets.npy'
+ALLELES = 'alleles.bin'
+# ASCII digits only: str.isdigit() also accepts e.g. superscripts, which int() rejects
+RSID_PATTERN = re.compile(r'rs([0-9]+)')
+CHUNK = 1000000 # records per array while writing an index
+
+
+def rsid_to_int(rsid:str):
+    """
+    'rs123' -> 123, None if the text is not an rsID.
+    """
+    m = RSID_PATTERN.fullmatch(rsid.lower().strip())
+    return int(m.group(1)) if m else None
+
+
+def _read_chunks(records, with_alleles:bool, size:int = CHUNK):
+    """
+    (rsids, allele lengths, allele bytes) numpy arrays for every size records,
+    so no Python object is kept per record.
+    """
+    ids = np.empty(size, dtype=np.int64)
+    lengths = np.zeros(size, dtype=np.int64)
+    alleles = []
+    n = 0
+    for rsid, ref, alt in records:
+        i = rsid_to_int(rsid)
+        if i is None:
+            continue
+        ids[n] = i
+        if with_alleles:
+            allele = f'{ref}\t{alt}'.encode('utf-8')
+            lengths[n] = len(allele)
+            alleles.append(allele)
+        n += 1
+        if n == size:
+            yield ids.copy(), lengths.copy(), np.frombuffer(b''.join(alleles), dtype=np.uint8)
+            alleles.clear()
+            n = 0
+    yield ids[:n].copy(), lengths[:n].copy(), np.frombuffer(b''.join(alleles), dtype=np.uint8)
+
+
+def write_rsid_index(records, out_dir:str, with_alleles:bool = True):
+    """
+    Write an rsID index to out_dir.
+
+    Args:
+        records: iterable of (rsid, ref, alt) tuples, e.g. parsed dbSNP nodes.
+        out_dir: directory for the index files.
+        with_alleles: also store ref/alt for every rsID.
+
+    The index is a sorted, de-duplicated int64 array (rsids.npy). With alleles,
+    'ref\\talt' strings are stored in alleles.bin in the same order, delimited by
+    allele_offsets.npy. Records are read into numpy chunks, about 16 bytes plus
+    the allele text per record.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    chunks = list(_read_chunks(records, with_alleles, CHUNK))
+    ids = np.concatenate([c[0] for c in chunks])
+    order = np.argsort(ids, kind='stable')
+    ids = ids[order]
+    keep = np.ones(len(ids), dtype=bool)
+    keep[1:] = ids[1:] != ids[:-1] # first record wins for duplicated rsIDs
+    np.save(os.path.join(out_dir, RSIDS), ids[keep])
+    del ids
+
+    if with_alleles:
+        lengths = np.concatenate([c[1] for c in chunks])
+        alleles = np.concatenate([c[2] for c in chunks])
+        del chunks
+        starts = np.zeros(len(lengths), dtype=np.int64)
+        np.cumsum(lengths[:-1], out=starts[1:])
+        order = order[keep]
+        offsets = np.zeros(len(order) + 1, dtype=np.int64)
+        np.cumsum(lengths[order], out=offsets[1:])
+        with open(os.path.join(out_dir, ALLELES), 'wb') as f:
+            for b in range(0, len(order), CHUNK):
+                idx = order[b:b + CHUNK]
+                # source position of every output byte of this chunk
+                shift = starts[idx] - (offsets[b:b + len(idx)] - offsets[b])
+                pos = np.repeat(shift, lengths[idx]) + np.arange(offsets[b + len(idx)] - offsets[b])
+                f.write(alleles[pos].tobytes())
+        np.save(os.path.join(out_dir, ALLELE_OFFSETS), offsets)
+    return out_dir
+
+
+class RsidIndex:
+    """
+    Read-only, memory-mapped view of an index written by write_rsid_index.
+    Lookups are binary searches over the sorted rsID array, so nothing is
+    loaded into memory up front.
+    """
+    def __init__(self, index_dir:str):
+        self.index_dir = index_dir
+        self.rsids = np.load(os.path.join(index_dir, RSIDS), mmap_mode='r')
+        self.offsets = None
+        self.alleles = None
+        allele_file = os.path.join(index_dir, ALLELES)
+        if os.path.exists(allele_file):
+            self.offsets = np.load(os.path.join(index_dir, ALLELE_OFFSETS), mmap_mode='r')
+            if os.path.getsize(allele_file) > 0: # numpy cannot map empty files
+                self.alleles = np.memmap(allele_file, dtype=np.uint8, mode='r')
+
+    def __len__(self):
+        return len(self.rsids)
+
+    def __contains__(self, rsid):
+        return self.position(rsid) is not None
+
+    def position(self, rsid):
+        """
+        Position of an rsID ('rs123' or 123) in the index, None if absent.
+        """
+        i = rsid_to_int(rsid) if isinstance(rsid, str) else rsid
+        if i is None:
+            return None
+        pos = int(np.searchsorted(self.rsids, i))
+        if pos < len(self.rsids) and self.rsids[pos] == i:
+            return pos
+        return None
+
+    def contains_many(self, rsids):
+        """
+        Vectorized membership test for an array of integer rsIDs.
+        """
+        rsids = np.asarray(rsids, dtype=np.int64)
+        if len(self.rsids) == 0:
+            return np.zeros(len(rsids), dtype=bool)
+        pos = np.minimum(np.searchsorted(self.rsids, rsids), len(self.rsids) - 1)
+        return self.rsids[pos] == rsids
+
+    def get_alleles(self, rsid):
+        """
+        (ref, alt) for an rsID, None if it is absent or alleles were not stored.
+        """
+        pos = self.position(rsid)
+        if pos is None or self.offsets is None:
+            return None
+        start, end = self.offsets[pos], self.offsets[pos + 1]
+        if self.alleles is None or start == end:
+            return ('', '')
+        ref, alt = bytes(self.alleles[start:end]).decode('utf-8').split('\t')
+        return (ref, alt)
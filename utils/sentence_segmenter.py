@@ -0,0 +1,100 @@
+import atexit
+from concurrent.futures import ProcessPoolExecutor
+
+# lowercased, without the final period, as punkt stores them. Words that also
+# end sentences in abstracts ('incubated for 30 min. The cells ...') are left
+# out: punkt never splits after an abbreviation unless its orthographic
+# heuristic overrides it.
+BIOMEDICAL_ABBREVIATIONS = {
+    'e.g', 'i.e', 'cf', 'vs', 'viz', 'etc', 'al', 'approx', 'ca', 'resp',
+    'fig', 'figs', 'tab', 'ref', 'refs', 'eq', 'eqs', 'suppl', 'nos',
+    'i.v', 'i.p', 'i.m', 'i.c.v', 's.c', 'p.o', 'b.i.d', 't.i.d', 'q.i.d', 'q.d',
+    'sp', 'spp', 'subsp', 'ssp', 'cv',
+    'conc', 'avg', 'prof',
+}
+
+
+def _load_punkt(language:str):
+    try:
+        from nltk.tokenize import PunktTokenizer # nltk >= 3.8.2
+        return PunktTokenizer(language)
+    except ImportError:
+        import nltk.data
+        return nltk.data.load(f'tokenizers/punkt/{language}.pickle')
+
+
+class SentenceSegmenter:
+    """
+    Punkt sentence splitter loaded once and extended with biomedical
+    abbreviations, so 'e.g.', 'i.v.' or 'Fig.' do not end a sentence.
+    """
+    def __init__(self, language:str = 'english', abbreviations:set = BIOMEDICAL_ABBREVIATIONS):
+        self.tokenizer = _load_punkt(language)
+        self.tokenizer._params.abbrev_types.update(abbreviations)
+
+    def split(self, text:str):
+        return self.tokenizer.tokenize(text)
+
+    def spans(self, text:str):
+        """
+        (start, end) character offsets of the sentences in text.
+        """
+        return list(self.tokenizer.span_tokenize(text))
+
+    def split_many(self, texts, n_workers:int = 1, chunksize:int = 256, executor=None):
+        """
+        Split a batch of texts, in order. Non-string texts give no sentences.
+        With n_workers > 1 the batch is spread over the process-wide worker
+        pool (see get_executor), whose workers load their segmenter once and
+        are reused across calls; or over executor, if given.
+        """
+        if executor is None and n_workers <= 1:
+            return [self.split(t) if isinstance(t, str) else [] for t in texts]
+        executor = executor or get_executor(n_workers)
+        return list(executor.map(_split_in_worker, texts, chunksize=chunksize))
+
+    def spans_many(self, texts, n_workers:int = 1, chunksize:int = 256, executor=None):
+        """
+        Batch version of spans, same conventions as split_many.
+        """
+        if executor is None and n_workers <= 1:
+            return [self.spans(t) if isinstance(t, str) else [] for t in texts]
+        executor = executor or get_executor(n_workers)
+        return list(executor.map(_spans_in_worker, texts, chunksize=chunksize))
+
+
+_SEGMENTER = None
+
+def get_segmenter():
+    """
+    Process-wide SentenceSegmenter, loaded on first use.
+    """
+    global _SEGMENTER
+    if _SEGMENTER is None:
+        _SEGMENTER = SentenceSegmenter()
+    return _SEGMENTER
+
+_EXECUTOR = None
+
+def get_executor(n_workers:int):
+    """
+    Process-wide pool of n_workers segmenter processes, started on first use
+    and shut down at exit; replaced if a different size is asked for.
+    """
+    global _EXECUTOR
+    if _EXECUTOR is not None and _EXECUTOR._max_workers != n_workers:
+        _EXECUTOR.shutdown()
+        _EXECUTOR = None
+    if _EXECUTOR is None:
+        _EXECUTOR = ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker)
+        atexit.register(_EXECUTOR.shutdown)
+    return _EXECUTOR
+
+def _init_worker():
+    get_segmenter()
+
+def _split_in_worker(text):
+    return get_segmenter().split(text) if isinstance(text, str) else []
+
+def _spans_in_worker(text):
+    return get_segmenter().spans(text) if isinstance(text, str) else []